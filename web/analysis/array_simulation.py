@@ -0,0 +1,225 @@
+import numpy as np
+from .logger import INFECTED, VACCINATED, SICK, DIED, SURVIVED
+from .simulation import Simulation
+
+
+class ArraySimulation(Simulation):
+    ''' A Simulation which stores the population in parallel NumPy arrays.
+
+    Every person is an index into the is_alive, is_vaccinated and is_infected
+        arrays, so a time step is a handful of vectorized operations instead
+        of a Python loop over Person objects. The public API is the same as
+        Simulation, except that people are ids: population, sample_contacts
+        and the get_* helpers return arrays of person ids rather than lists
+        of Person objects.
+    '''
+    # number of people each infected person interacts with per time step
+    INTERACTIONS = 100
+    # number of infected people whose interactions are drawn at once
+    CHUNK_SIZE = 10000
+
+    def __init__(self, pop_size, vacc_percentage, virus, initial_infected=1,
+                 seed=None, binary_log=False, async_log=False, log_dir=''):
+        """Same as super class initializer, except the population is stored
+           in three boolean arrays indexed by person id.
+
+        """
+        self._seed_rng(seed)
+        self.pop_size = pop_size  # Int
+        self.next_person_id = pop_size  # Int
+        self.virus = virus  # Virus object
+        self.initial_infected = initial_infected  # Int
+        self.total_infected = 0  # Int
+        self.vacc_percentage = vacc_percentage  # float between 0 and 1
+        self.total_dead = 0  # Int
+        self._open_log(binary_log, async_log, log_dir)
+        self.newly_infected = np.empty(0, dtype=np.int64)
+        self._create_population()
+        self._count_population()
+        self.logger.write_metadata(self.pop_size, self.vacc_percentage,
+                                   self.virus.name,
+                                   self.virus.mortality_rate,
+                                   self.virus.repro_rate)
+
+    def _create_population(self):
+        """Fill the population arrays, choosing the vaccinated and initially
+           infected people without replacement.
+
+           Returns:
+           ndarray: the ids of every person in the population
+
+        """
+        number_vaccinated = round(self.vacc_percentage * self.pop_size)
+        total = self.rng.choice(self.pop_size,
+                                number_vaccinated + self.initial_infected,
+                                replace=False)
+        self.is_alive = np.ones(self.pop_size, dtype=bool)
+        self.is_vaccinated = np.zeros(self.pop_size, dtype=bool)
+        self.is_infected = np.zeros(self.pop_size, dtype=bool)
+        infected = self.random_infected(total)
+        self.is_infected[infected] = True
+        self.is_vaccinated[total[len(infected):]] = True
+        self.total_infected += self.initial_infected
+        return np.arange(self.pop_size)
+
+    def _seed_rng(self, seed):
+        """Give this simulation its own NumPy random number generator.
+
+           Parameters:
+           seed(int, SeedSequence or None): entropy for the generator. None
+                                            draws fresh entropy from the OS.
+
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def population(self):
+        '''The ids of every person, in place of a list of Person objects.'''
+        return np.arange(self.pop_size)
+
+    def random_infected(self, total):
+        """Return the ids of the people to infect at the start.
+
+           Parameters:
+           total(ndarray): ids drawn in random order, without replacement
+
+           Returns:
+           ndarray: the first initial_infected of the ids
+
+        """
+        return total[:self.initial_infected]
+
+    def get_infected(self):
+        '''Return an array of the ids of alive infected people.'''
+        return np.flatnonzero(self.is_infected & self.is_alive)
+
+    def get_alive(self, id=-1):
+        '''Return an array of the ids of alive people, excluding id.'''
+        alive = np.flatnonzero(self.is_alive)
+        if id >= 0:
+            alive = alive[alive != id]
+        return alive
+
+    def _remove_living(self, person):
+        '''Mark the person with the given id as dead.'''
+        self.is_alive[person] = False
+
+    def sample_contacts(self, person, k):
+        """Return the ids of k random living people other than the given
+           person.
+
+           Parameters:
+           person(int): id of the person whose contacts are being drawn
+           k(int): how many contacts to draw
+
+           Returns:
+           ndarray: ids of people, sampled without replacement
+
+        """
+        return self.rng.choice(self.get_alive(person), k, replace=False)
+
+    def _count_population(self):
+        """Set the running tallies of the population from the arrays."""
+        self.alive_num = int(np.count_nonzero(self.is_alive))
+        self.vacc_num = int(np.count_nonzero(self.is_alive &
+                                             self.is_vaccinated))
+        self.infected_num = int(np.count_nonzero(self.is_alive &
+                                                 self.is_infected))
+        self.neither_num = self.alive_num - self.vacc_num - self.infected_num
+        self.total_dead = self.pop_size - self.alive_num
+
+    def time_step(self, time_step_counter):
+        """Compute one time step in the simulation.
+
+        Every person infected at the start of the step interacts with up to
+            100 alive people, and then resolves their infection. Contacts are
+            drawn with replacement, which matches the original sampling closely
+            once the population is much larger than 100.
+
+        Returns:
+            int: the number of people who died during this step
+
+        """
+        infected = self.get_infected()
+        alive = self.get_alive()
+        interactions = min(self.INTERACTIONS, len(alive) - 1)
+        if interactions > 0:
+            for start in range(0, len(infected), self.CHUNK_SIZE):
+                people = infected[start:start + self.CHUNK_SIZE]
+                contacts = alive[self.rng.integers(
+                    0, len(alive), size=(len(people), interactions))]
+                self.interaction(np.repeat(people, interactions),
+                                 contacts.ravel())
+        survived = self.did_survive_infection(infected)
+        survived_this_step = int(np.count_nonzero(survived))
+        dead_this_step = len(infected) - survived_this_step
+        self.infected_num -= len(infected)
+        self.vacc_num += survived_this_step
+        self.alive_num -= dead_this_step
+        self.total_dead += dead_this_step
+        infected_this_step = self._infect_newly_infected()
+        self.logger.log_time_step(time_step_counter, infected_this_step,
+                                  dead_this_step, self.current_infected(),
+                                  self.total_dead)
+        return dead_this_step
+
+    def interaction(self, person, random_person):
+        """Resolve a batch of interactions between living people.
+
+        Parameters:
+            person (ndarray): ids of the infected people
+            random_person (ndarray): ids of the people each one interacts with
+
+        """
+        susceptible = (self.is_alive[random_person] &
+                       ~self.is_vaccinated[random_person] &
+                       ~self.is_infected[random_person])
+        chance = self.rng.random(len(random_person))
+        did_infect = susceptible & (chance < self.virus.repro_rate)
+        # the first contact with each person is the one that infects them
+        infected, first = np.unique(random_person[did_infect],
+                                    return_index=True)
+        if self.binary_log:
+            self.logger.log_events(INFECTED, person[did_infect][first],
+                                   infected)
+            vaccinated = self.is_vaccinated[random_person]
+            self.logger.log_events(VACCINATED, person[vaccinated],
+                                   random_person[vaccinated])
+            sick = self.is_infected[random_person]
+            self.logger.log_events(SICK, person[sick], random_person[sick])
+        self.is_infected[infected] = True
+        self.newly_infected = np.concatenate((self.newly_infected, infected))
+        self.total_infected += len(infected)
+        self.neither_num -= len(infected)
+        self.infected_num += len(infected)
+
+    def did_survive_infection(self, ids):
+        """Resolve the infections of the given people at once.
+
+        Parameters:
+            ids (ndarray): ids of alive, infected people
+
+        Returns:
+            ndarray: a boolean array, True where that person survived
+
+        """
+        survived = self.rng.random(len(ids)) >= self.virus.mortality_rate
+        if self.binary_log:
+            self.logger.log_events(SURVIVED, ids[survived], ids[survived])
+            self.logger.log_events(DIED, ids[~survived], ids[~survived])
+        self.is_alive[ids[~survived]] = False
+        self.is_vaccinated[ids[survived]] = True
+        self.is_infected[ids[survived]] = False
+        return survived
+
+    def _infect_newly_infected(self):
+        """Clear the people infected during this step, and return how many
+           there were.
+
+        """
+        infected_this_time = len(self.newly_infected)
+        self.newly_infected = np.empty(0, dtype=np.int64)
+        return infected_this_time
@@ -0,0 +1,110 @@
+import hashlib
+import io
+import json
+import threading
+from collections import namedtuple
+
+# Draws the bar graphs of a simulation's time steps with matplotlib's object
+# oriented API, on one Figure which is cleared and reused for every chart,
+# instead of the global state of pyplot.
+
+# content types of the image formats charts can be rendered in
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+POPULATIONS = ["Vaccinated", "Infected", "Dead", "No Interaction"]
+TITLE = "Herd Immunity Defense Against Disease Spread"
+Y_LABEL = "Number of Survivors"
+
+
+# the inputs of one bar graph, in the order render and chart_key take them
+BarGraph = namedtuple('BarGraph',
+                      ['labels', 'values', 'x_label', 'y_label', 'title'])
+
+
+def x_label(time_step):
+    '''Return the label of the x-axis of the bar graph for a time step.'''
+    return f'Population Sizes During Time Step {time_step}'
+
+
+def chart_key(image_format, labels, values, x_label, y_label, title):
+    """Return the address of a chart's content in a cache.
+
+       Charts drawn from the same inputs are identical, so they share one
+       address no matter which experiment or step they belong to.
+
+       Returns:
+       str: the SHA-256 hex digest of the inputs
+
+    """
+    content = json.dumps([image_format, list(labels),
+                          [float(value) for value in values],
+                          x_label, y_label, title])
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class ChartRenderer:
+    ''' Draws bar graphs on one reusable Figure, and saves them as images.
+
+    matplotlib is imported, and the Figure made, the first time a chart is
+        drawn. A Figure can only draw one chart at a time, so render holds a
+        lock while it draws and saves.
+    '''
+
+    def __init__(self):
+        '''Set up the renderer, without drawing anything yet.'''
+        self.figure = None
+        self.axes = None
+        self.lock = threading.Lock()
+
+    def _setup(self):
+        '''Make the Figure, with a canvas that draws it without a display.'''
+        import matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        matplotlib.rcdefaults()
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.add_subplot()
+
+    def draw(self, labels, values, x_label, y_label, title):
+        """Replace whatever is on the Figure with a new bar graph.
+
+           Parameters:
+           labels(list): the name of each bar
+           values(list): the height of each bar
+           x_label(str): label of the x-axis
+           y_label(str): label of the y-axis
+           title(str): title of the graph
+
+        """
+        if self.figure is None:
+            self._setup()
+        axes = self.axes
+        axes.clear()
+        y_pos = list(range(len(labels)))
+        axes.bar(y_pos, values, align='center', alpha=0.5)
+        axes.set_xticks(y_pos)
+        axes.set_xticklabels(labels)
+        axes.set_ylabel(y_label)
+        axes.set_xlabel(x_label)
+        axes.set_title(title)
+
+    def save(self, image_format='png'):
+        """Return the chart on the Figure as an image, one of FORMATS."""
+        buffer = io.BytesIO()
+        self.figure.savefig(buffer, format=image_format)
+        return buffer.getvalue()
+
+    def render(self, labels, values, x_label, y_label, title,
+               image_format='png'):
+        """Draw a bar graph, and return it as an image.
+
+           Returns:
+           bytes: the image, in the given format
+
+        """
+        with self.lock:
+            self.draw(labels, values, x_label, y_label, title)
+            return self.save(image_format)
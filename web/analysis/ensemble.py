@@ -0,0 +1,257 @@
+import copy
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .web_simulation import WebSimulation
+
+# Runs many replicates of the same simulation, and summarizes the spread of
+# their results at each time step without keeping every replicate in memory.
+#
+# The streaming quantile estimates use the P-squared algorithm from:
+# Jain, R. and Chlamtac, I. (1985) The P2 Algorithm for Dynamic Calculation of
+# Quantiles and Histograms Without Storing Observations.
+
+# the TimeStep fields summarized at each step
+METRICS = [
+    'total_infected',
+    'current_infected',
+    'dead',
+    'total_vaccinated',
+    'alive',
+    'uninfected',
+    'uninteracted',
+]
+# quantiles estimated for each metric, at each step
+QUANTILES = (0.05, 0.5, 0.95)
+# z-score of the two-sided 95% confidence interval of the mean
+CONFIDENCE_Z = 1.96
+# replicates queued per worker process, ahead of the one being summarized
+REPLICATES_PER_WORKER = 2
+
+
+class RunningStats:
+    '''Mean and variance of a stream of numbers, by Welford's method.'''
+
+    def __init__(self):
+        '''Start with no observations.'''
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        '''Update the statistics with one more observation.'''
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def std(self):
+        '''Return the sample standard deviation of the observations.'''
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def interval(self):
+        '''Return the bounds of the 95% confidence interval of the mean.'''
+        margin = CONFIDENCE_Z * self.std() / math.sqrt(max(self.count, 1))
+        return self.mean - margin, self.mean + margin
+
+
+class P2Quantile:
+    '''Estimate of a quantile of a stream of numbers, in constant memory.'''
+
+    def __init__(self, p):
+        '''Track the p-th quantile, where p is between 0 and 1.'''
+        self.p = p
+        # exact observations, until there are enough to place the markers
+        self.initial = list()
+        self.heights = None
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        '''Update the estimate with one more observation.'''
+        if self.heights is None:
+            self.initial.append(x)
+            if len(self.initial) == 5:
+                self.heights = sorted(self.initial)
+            return
+        q, n = self.heights, self.positions
+        # find the cell the observation falls in, stretching the ends
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        # move the middle markers towards where they should be
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if ((d >= 1 and n[i + 1] - n[i] > 1) or
+                    (d <= -1 and n[i - 1] - n[i] < -1)):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        '''Return the piecewise-parabolic prediction of marker i's height.'''
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        '''Return the current estimate, or None without any observations.'''
+        if self.heights is not None:
+            return self.heights[2]
+        if len(self.initial) == 0:
+            return None
+        return float(np.quantile(self.initial, self.p))
+
+
+class Ensemble:
+    '''Accumulates the per-step metrics of many replicates of a simulation.
+
+    Replicates are added one at a time, and only summarized: the memory used
+        grows with the number of steps, not the number of replicates. A
+        replicate that ends early keeps its final values in later steps.
+    '''
+
+    def __init__(self):
+        '''Start with no replicates.'''
+        self.replicates = 0
+        self.steps = list()
+        # the last rows of the replicates, summarized like a step. Every
+        # replicate so far has ended by a step none of them reached, so that
+        # step starts from a copy of these accumulators
+        self.finals = self._new_step()
+
+    def _new_step(self):
+        '''Return empty accumulators for every metric of one step.'''
+        return {
+            metric: (RunningStats(), [P2Quantile(p) for p in QUANTILES])
+            for metric in METRICS
+        }
+
+    def _observe(self, accumulators, row):
+        '''Add one replicate's row of metrics to the accumulators of a step.'''
+        for metric, (stats, quantiles) in accumulators.items():
+            stats.add(row[metric])
+            for quantile in quantiles:
+                quantile.add(row[metric])
+
+    def add(self, rows):
+        """Add the results of one replicate.
+
+           Parameters:
+           rows(list): a dict of METRICS for each time step of the replicate
+
+        """
+        final = rows[-1]
+        # steps no earlier replicate reached start from their final values
+        for step in range(len(self.steps), len(rows)):
+            self.steps.append(copy.deepcopy(self.finals))
+        for step, accumulators in enumerate(self.steps):
+            self._observe(accumulators,
+                          rows[step] if step < len(rows) else final)
+        self._observe(self.finals, final)
+        self.replicates += 1
+
+    def summary(self):
+        """Return the mean, confidence interval and quantiles of every metric
+           at each step.
+
+           Returns:
+           dict: the number of replicates, and a list with a dict per step
+
+        """
+        steps = list()
+        for step_id, accumulators in enumerate(self.steps, start=1):
+            step = {'step_id': step_id}
+            for metric, (stats, quantiles) in accumulators.items():
+                low, high = stats.interval()
+                step[metric] = {
+                    'mean': stats.mean,
+                    'std': stats.std(),
+                    'ci_low': low,
+                    'ci_high': high,
+                }
+                for p, quantile in zip(QUANTILES, quantiles):
+                    step[metric][f'q{round(p * 100):02d}'] = quantile.value()
+            steps.append(step)
+        return {'replicates': self.replicates, 'steps': steps}
+
+
+def run_replicate(virus, pop_size, vacc_percentage, initial_infected, seed):
+    """Run one simulation until it ends.
+
+       Replicates run on WebSimulation, the engine Experiment.run_experiment
+       uses, so their steps are the same model as the TimeSteps of the
+       Experiment they are summarized beside. WebSimulation writes no log.
+
+       Returns:
+       list: a dict of METRICS for each time step
+
+    """
+    sim = WebSimulation(pop_size, vacc_percentage, virus, initial_infected,
+                        seed=seed)
+    rows = list()
+    while True:
+        fields = sim.create_time_step(len(rows) + 1, None)
+        rows.append({metric: fields[metric] for metric in METRICS})
+        if sim._simulation_should_continue():
+            return rows
+
+
+def run_ensemble(virus, pop_size, vacc_percentage, initial_infected,
+                 replicates, seed=None, max_workers=None):
+    """Run replicates of one simulation in parallel, and summarize them.
+
+       Each replicate gets an independent random stream, spawned from the
+       seed. Results are added to the Ensemble as they come back, in order,
+       and are not kept afterwards. Only a few replicates per process are
+       submitted ahead of the one being added, so results which finish out
+       of order are never piled up.
+
+       Parameters:
+       virus(Virus): the virus spreading through the population
+       pop_size(int): size of the population
+       vacc_percentage(float): share of the population initially vaccinated
+       initial_infected(int): number of people initially infected
+       replicates(int): number of simulations to run
+       seed(int): entropy for the replicates' seeds, None for fresh entropy
+       max_workers(int): number of processes, defaults to the number of cores
+
+       Returns:
+       dict: the summary of the Ensemble
+
+    """
+    seeds = np.random.SeedSequence(seed).spawn(replicates)
+    ensemble = Ensemble()
+    window = REPLICATES_PER_WORKER * (max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for replicate_seed in seeds:
+            pending.append(executor.submit(run_replicate, virus, pop_size,
+                                           vacc_percentage, initial_infected,
+                                           replicate_seed))
+            if len(pending) >= window:
+                ensemble.add(pending.popleft().result())
+        while len(pending) > 0:
+            ensemble.add(pending.popleft().result())
+    return ensemble.summary()
@@ -1,3 +1,12 @@
+import atexit
+import json
+import os
+import queue
+import struct
+import threading
+import numpy as np
+
+
 class Logger(object):
     ''' Utility class responsible for logging all interactions during the
         simulation.
@@ -8,10 +17,57 @@ class Logger(object):
     # PROTIP: Write your tests before you solve each function, that way you can
     # test them one by one as you write your class.
 
-    def __init__(self, file_name):
-        # TODO:  Finish this initialization method. The file_name passed should
-        # be the full file name of the file that the logs will be written to.
+    # bytes of log lines held in memory before they are written to disk
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self, file_name, buffer_size=BUFFER_SIZE,
+                 async_write=False):
+        '''The file_name passed should be the full file name of the file that
+        the logs will be written to.
+
+        The file is opened once, on the first write, and kept open with a
+        large buffer. Lines reach the disk at the end of each time step, or
+        when the Logger is flushed or closed (or leaves a with block). A
+        Logger left open is closed when the interpreter exits.
+        With async_write, the file is an AsyncWriter, so the disk is written
+        on a background thread.
+        '''
         self.file_name = file_name
+        self.buffer_size = buffer_size
+        self.async_write = async_write
+        self.file = None
+
+    def __enter__(self):
+        '''Use the Logger as a context manager, which closes it on exit.'''
+        return self
+
+    def __exit__(self, *exc_info):
+        '''Write any buffered lines to disk, and close the file.'''
+        self.close()
+
+    def _open(self, mode='a'):
+        '''Return the open log file, opening it in the given mode if needed.'''
+        if self.file is None:
+            if self.async_write:
+                self.file = AsyncWriter(self.file_name, mode,
+                                        self.buffer_size)
+            else:
+                self.file = open(self.file_name, mode,
+                                 buffering=self.buffer_size)
+            atexit.register(self.close)
+        return self.file
+
+    def flush(self):
+        '''Write any buffered lines to disk.'''
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        '''Write any buffered lines to disk, and close the file.'''
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            atexit.unregister(self.close)
 
     def write_metadata(self, pop_size, vacc_percentage, virus_name,
                        mortality_rate, basic_repro_num):
@@ -19,12 +75,14 @@ class Logger(object):
         The simulation class should use this method immediately to log the
         specific parameters of the simulation as the first line of the file.
         '''
-        f = open(self.file_name, "w+")
+        # start the file over
+        self.close()
+        f = self._open("w")
         f.write(f"Population size: {pop_size}\tVaccination percentage: " +
                 f"{vacc_percentage}\tVirus name: {virus_name}\t" +
                 f"Mortality rate: {mortality_rate}\t" +
                 f"Basic reproduction number: {basic_repro_num}\n")
-        f.close()
+        f.flush()
 
     def log_interaction(self, person, random_person, random_person_sick=None,
                         random_person_vacc=None, did_infect=None):
@@ -39,7 +97,7 @@ class Logger(object):
             "{person.ID} didn't infect {random_person.ID} because
             {'vaccinated' or 'already sick'} \n"
         '''
-        f = open(self.file_name, 'a')
+        f = self._open()
         if did_infect and not random_person_vacc and not random_person_sick:
             f.write(f"{person._id} infects {random_person._id}\n")
         elif not did_infect:
@@ -49,7 +107,6 @@ class Logger(object):
             elif random_person_vacc:
                 f.write(f"{person._id} didn't infect {random_person._id} " +
                         "because they are already vaccinated\n")
-        f.close()
 
     def log_infection_survival(self, person, did_die_from_infection):
         ''' The Simulation object uses this method to log the results of every
@@ -59,14 +116,12 @@ class Logger(object):
             "{person.ID} died from infection\n" or
             "{person.ID} survived infection.\n"
         '''
-        f = open(self.file_name, 'a')
+        f = self._open()
         if did_die_from_infection:
             f.write(f"{person._id} died from infection.\n")
         elif not did_die_from_infection:
             f.write(f"{person._id} survived infection.\n")
 
-        f.close()
-
     def log_time_step(self, time_step_number, infected_this_step,
                       died_this_step, cur_infected, total_dead):
         ''' STRETCH CHALLENGE DETAILS:
@@ -87,7 +142,7 @@ class Logger(object):
             "Time step {time_step_number} ended,
                 beginning {time_step_number + 1}\n"
         '''
-        f = open(self.file_name, 'a')
+        f = self._open()
         f.write("- - - - - - - - - - - - - - - - - - - - - \n")
         f.write(f"{infected_this_step} people were infected during TIME STEP "
                 + f"{time_step_number}.\n")
@@ -98,8 +153,326 @@ class Logger(object):
         f.write(f"TIME STEP {time_step_number} ended, beginning TIME STEP " +
                 f"{time_step_number + 1}.\n")
         f.write("- - - - - - - - - - - - - - - - - - - - - \n\n")
-        f.close()
+        # the end of a time step is a natural point to write to disk
+        f.flush()
         # TODO: Finish this method. This method should log when a time step
         # ends, and a new one begins.
         # NOTE: Here is an opportunity for a stretch challenge!
         pass
+
+
+class NullLogger(object):
+    ''' Stands in for a Logger in simulations which keep no log, with the
+        same methods as Logger and BinaryLogger, doing nothing.
+    '''
+    file_name = None
+
+    def __enter__(self):
+        '''Use the NullLogger as a context manager, like a Logger.'''
+        return self
+
+    def __exit__(self, *exc_info):
+        '''Do nothing, as there is no file to close.'''
+
+    def flush(self):
+        '''Do nothing, as nothing is buffered.'''
+
+    def close(self):
+        '''Do nothing, as there is no file to close.'''
+
+    def write_metadata(self, *args):
+        '''Ignore the metadata of the simulation.'''
+
+    def log_interaction(self, *args, **kwargs):
+        '''Ignore an interaction.'''
+
+    def log_infection_survival(self, *args):
+        '''Ignore the resolution of an infection.'''
+
+    def log_time_step(self, *args):
+        '''Ignore the end of a time step.'''
+
+    def log_event(self, *args):
+        '''Ignore an event.'''
+
+    def log_events(self, *args):
+        '''Ignore a batch of events.'''
+
+
+# types of event recorded by the BinaryLogger
+INFECTED = 0  # the source infected the target
+VACCINATED = 1  # the source didn't infect the target, who is vaccinated
+SICK = 2  # the source didn't infect the target, who is already sick
+DIED = 3  # the source died from their infection
+SURVIVED = 4  # the source survived their infection
+# layout of one event on disk: step, source id, target id, event type
+EVENT_DTYPE = np.dtype([
+    ('step', '<u4'),
+    ('source', '<u4'),
+    ('target', '<u4'),
+    ('event', 'u1'),
+])
+# first bytes of every binary event log, and the length of its metadata
+MAGIC = b'HIEVENT1'
+HEADER = struct.Struct('<I')
+
+
+class BinaryLogger(object):
+    ''' Logs the same events as Logger, as fixed-width binary records.
+
+    Each event is one record of EVENT_DTYPE, 13 bytes long, instead of a line
+        of text. Records are collected in memory and appended to the file in
+        chunks, after the metadata header. Events without a target, like
+        deaths, have their source as the target. Use read_events to load the
+        records back without parsing them. A BinaryLogger left open is closed
+        when the interpreter exits.
+    '''
+    # bytes of records held in memory before they are appended to the file
+    CHUNK_SIZE = 1 << 20
+
+    RECORD = struct.Struct('<IIIB')
+
+    def __init__(self, file_name, chunk_size=CHUNK_SIZE, async_write=False):
+        '''The file_name passed should be the full file name of the file that
+        the events will be written to. With async_write, chunks are written
+        by an AsyncWriter on a background thread.
+        '''
+        self.file_name = file_name
+        self.chunk_size = chunk_size
+        self.async_write = async_write
+        self.file = None
+        self.chunk = bytearray()
+        # the number of the time step currently being logged
+        self.step = 1
+
+    def __enter__(self):
+        '''Use the BinaryLogger as a context manager, which closes it on
+        exit.'''
+        return self
+
+    def __exit__(self, *exc_info):
+        '''Write any buffered records to disk, and close the file.'''
+        self.close()
+
+    def _open(self, mode='ab'):
+        '''Return the open log file, opening it in the given mode if needed.'''
+        if self.file is None:
+            if self.async_write:
+                self.file = AsyncWriter(self.file_name, mode, 1)
+            else:
+                self.file = open(self.file_name, mode, buffering=0)
+            atexit.register(self.close)
+        return self.file
+
+    def flush(self):
+        '''Append the records held in memory to the file.'''
+        if len(self.chunk) > 0:
+            self._open().write(self.chunk)
+            self.chunk = bytearray()
+
+    def close(self):
+        '''Write any buffered records to disk, and close the file.'''
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            atexit.unregister(self.close)
+
+    def log_event(self, event, source, target):
+        '''Record one event of the current time step, by person ids.'''
+        self.chunk += self.RECORD.pack(self.step, source, target, event)
+        if len(self.chunk) >= self.chunk_size:
+            self.flush()
+
+    def log_events(self, event, sources, targets):
+        """Record many events of the same type at once.
+
+           Parameters:
+           event(int): the type of every event, such as INFECTED
+           sources(ndarray): person ids of the source of each event
+           targets(ndarray): person ids of the target of each event
+
+        """
+        records = np.empty(len(sources), dtype=EVENT_DTYPE)
+        records['step'] = self.step
+        records['source'] = sources
+        records['target'] = targets
+        records['event'] = event
+        self.chunk += records.tobytes()
+        if len(self.chunk) >= self.chunk_size:
+            self.flush()
+
+    def write_metadata(self, pop_size, vacc_percentage, virus_name,
+                       mortality_rate, basic_repro_num):
+        '''Start the file over with a header holding the parameters of the
+        simulation.
+        '''
+        self.close()
+        self.chunk = bytearray()
+        self.step = 1
+        metadata = json.dumps({
+            'pop_size': pop_size,
+            'vacc_percentage': vacc_percentage,
+            'virus_name': virus_name,
+            'mortality_rate': mortality_rate,
+            'basic_repro_num': basic_repro_num,
+        }).encode()
+        f = self._open('wb')
+        f.write(MAGIC + HEADER.pack(len(metadata)) + metadata)
+
+    def log_interaction(self, person, random_person, random_person_sick=None,
+                        random_person_vacc=None, did_infect=None):
+        '''Record an interaction, in the same cases as Logger does.'''
+        if did_infect and not random_person_vacc and not random_person_sick:
+            self.log_event(INFECTED, person._id, random_person._id)
+        elif not did_infect:
+            if random_person_sick:
+                self.log_event(SICK, person._id, random_person._id)
+            elif random_person_vacc:
+                self.log_event(VACCINATED, person._id, random_person._id)
+
+    def log_infection_survival(self, person, did_die_from_infection):
+        '''Record whether a person died from, or survived, their infection.'''
+        event = DIED if did_die_from_infection else SURVIVED
+        self.log_event(event, person._id, person._id)
+
+    def log_time_step(self, time_step_number, infected_this_step,
+                      died_this_step, cur_infected, total_dead):
+        '''End a time step. The summary is not stored, since it can be
+        counted from the events (see event_counts).
+        '''
+        self.step = time_step_number + 1
+        self.flush()
+
+
+def read_events(file_name):
+    """Memory-map the records of a binary event log.
+
+       Parameters:
+       file_name(str): a file written by a BinaryLogger
+
+       Returns:
+       tuple: the metadata (dict), and the records (memmap of EVENT_DTYPE)
+
+    """
+    with open(file_name, 'rb') as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{file_name} is not a binary event log.")
+        (length,) = HEADER.unpack(f.read(HEADER.size))
+        metadata = json.loads(f.read(length))
+    offset = len(MAGIC) + HEADER.size + length
+    if os.path.getsize(file_name) == offset:
+        # memmap can't map an empty region
+        return metadata, np.empty(0, dtype=EVENT_DTYPE)
+    return metadata, np.memmap(file_name, dtype=EVENT_DTYPE, mode='r',
+                               offset=offset)
+
+
+def event_counts(events):
+    """Count the events of each type in each time step.
+
+       Returns:
+       ndarray: counts[step, event], where row 0 is unused as steps start at 1
+
+    """
+    steps = int(events['step'].max()) + 1 if len(events) else 1
+    flat = (events['step'].astype(np.int64) * (SURVIVED + 1) +
+            events['event'])
+    counts = np.bincount(flat, minlength=steps * (SURVIVED + 1))
+    return counts.reshape(steps, SURVIVED + 1)
+
+
+class AsyncWriter(object):
+    ''' A file opened for writing, whose writes are made by a background
+        thread.
+
+    Writes are collected into chunks, and the chunks are passed to the
+        thread through a bounded queue, so the caller can go on while the disk
+        catches up. If the queue fills up, the caller waits for room, so
+        memory use stays bounded. close must be called to write everything
+        out and stop the thread, and is called when the interpreter exits if
+        it was not. The thread is a daemon, so one left running never holds
+        up the exit. An error in the thread is raised again in the caller,
+        on the next write, flush or close.
+    '''
+    # bytes (or characters) collected before they are handed to the thread
+    CHUNK_SIZE = 1 << 20
+    # chunks waiting for the thread before the caller has to wait
+    QUEUE_SIZE = 16
+
+    FLUSH = object()
+
+    def __init__(self, file_name, mode, chunk_size=CHUNK_SIZE,
+                 queue_size=QUEUE_SIZE):
+        '''Open the file in the given mode, and start the writing thread.'''
+        self.file = open(file_name, mode)
+        self.empty = b'' if 'b' in mode else ''
+        self.chunk_size = chunk_size
+        self.chunks = list()
+        self.size = 0
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._write, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def _write(self):
+        '''Write each chunk from the queue to the file, until told to stop.'''
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                return
+            # after an error, keep draining the queue so the caller never hangs
+            if self.error is not None:
+                continue
+            try:
+                if chunk is self.FLUSH:
+                    self.file.flush()
+                else:
+                    self.file.write(chunk)
+            except Exception as error:
+                self.error = error
+
+    def _raise_error(self):
+        '''Raise the error that stopped the thread from writing, if any.'''
+        if self.error is not None:
+            raise self.error
+
+    def _send(self):
+        '''Hand the collected writes to the thread, waiting if the queue is
+        full.'''
+        self._raise_error()
+        if len(self.chunks) > 0:
+            self.queue.put(self.empty.join(self.chunks))
+            self.chunks = list()
+            self.size = 0
+
+    @property
+    def closed(self):
+        '''Whether the file has been closed.'''
+        return self.file.closed
+
+    def write(self, data):
+        '''Add data to be written to the file. The data must not be changed
+        afterwards.'''
+        self.chunks.append(data)
+        self.size += len(data)
+        if self.size >= self.chunk_size:
+            self._send()
+
+    def flush(self):
+        '''Have the thread write out everything so far, without waiting for
+        it.'''
+        self._send()
+        self.queue.put(self.FLUSH)
+
+    def close(self):
+        '''Write out everything, stop the thread, and close the file.'''
+        if self.thread.is_alive():
+            atexit.unregister(self.close)
+            self._send()
+            self.queue.put(None)
+            self.thread.join()
+            self.file.close()
+        self._raise_error()
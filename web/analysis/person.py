@@ -1,10 +1,14 @@
 from .virus import Virus
 import random
-random.seed(42)
 
 
 class Person(object):
-    ''' Person objects will populate the simulation. '''
+    ''' Person objects will populate the simulation.
+
+    Attributes are stored in __slots__ rather than a __dict__, since a
+        simulation can hold millions of Persons at once.
+    '''
+    __slots__ = ('_id', 'is_alive', 'is_vaccinated', 'infection')
 
     def __init__(self, _id, is_vaccinated, infection=None):
         '''
@@ -23,14 +27,17 @@ class Person(object):
         self.is_vaccinated = is_vaccinated  # boolean
         self.infection = infection  # Virus object or None
 
-    def did_survive_infection(self):
+    def did_survive_infection(self, rng=random):
         '''
         Generate a random number and compare to virus's mortality_rate.
         If random number is smaller, person dies from the disease.
         If Person survives, they become vaccinated and they have no infection.
         Return a boolean value indicating whether they survived the infection.
+
+        The random number is drawn from rng, which the simulation passes in
+        so that each simulation has its own random stream.
         '''
-        immunity_strength = random.random()
+        immunity_strength = rng.random()
 
         if immunity_strength < self.infection.mortality_rate:
             self.is_alive = False
@@ -1,10 +1,11 @@
+import os
 import random
 import sys
+import numpy as np
 from .person import Person
-from .logger import Logger
+from .logger import Logger, BinaryLogger, NullLogger
 from .virus import Virus
 from . import visualizer
-random.seed(42)
 
 
 class Simulation(object):
@@ -18,7 +19,8 @@ class Simulation(object):
         infected people in a population are all variables that can be set when
         the program is run.
     '''
-    def __init__(self, pop_size, vacc_percentage, virus, initial_infected=1):
+    def __init__(self, pop_size, vacc_percentage, virus, initial_infected=1,
+                 seed=None, binary_log=False, async_log=False, log_dir=''):
         """Logger object logger records all events during the simulation.
         Population represents all Persons in the population.
         The next_person_id is the next available id for all created Persons,
@@ -35,8 +37,16 @@ class Simulation(object):
 
         All arguments will be passed as command-line arguments when the file is
             run.
+        The seed sets the random stream this simulation draws from. Passing
+            the children of one SeedSequence (see SeedSequence.spawn) gives
+            many simulations independent, reproducible streams.
+        Setting binary_log records events with a BinaryLogger, instead of as
+            text. Setting async_log writes the log to disk from a background
+            thread. The log is written in log_dir, the working directory by
+            default, and a log_dir of None keeps no log at all.
 
         """
+        self._seed_rng(seed)
         self.population = []  # List of Person objects
         self.pop_size = pop_size  # Int
         self.next_person_id = pop_size  # Int
@@ -45,17 +55,53 @@ class Simulation(object):
         self.total_infected = 0  # Int
         self.vacc_percentage = vacc_percentage  # float between 0 and 1
         self.total_dead = 0  # Int
-        self.file_name = "{}_simulation_pop_{}_vp_{}_infected_{}.txt".format(
-                        self.virus.name, self.pop_size, self.vacc_percentage,
-                        self.initial_infected)
-        self.logger = Logger(self.file_name)
+        self._open_log(binary_log, async_log, log_dir)
         self.newly_infected = []
         self.population = self._create_population()
+        self._count_population()
         self.logger.write_metadata(self.pop_size, self.vacc_percentage,
                                    self.virus.name,
                                    self.virus.mortality_rate,
                                    self.virus.repro_rate)
 
+    def _seed_rng(self, seed):
+        """Give this simulation its own random number generator.
+
+           Parameters:
+           seed(int, SeedSequence or None): entropy for the generator. None
+                                            draws fresh entropy from the OS.
+
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        state = seed.generate_state(4, dtype=np.uint64)
+        self.rng = random.Random(int.from_bytes(state.tobytes(), 'little'))
+
+    def _open_log(self, binary_log=False, async_log=False, log_dir=''):
+        """Set the file name and Logger of this simulation.
+
+           Parameters:
+           binary_log(bool): use a BinaryLogger, writing a .events file
+           async_log(bool): write the log through an AsyncWriter
+           log_dir(str): directory to write the log in, or None for no log
+
+        """
+        self.binary_log = binary_log
+        if log_dir is None:
+            self.file_name = None
+            self.logger = NullLogger()
+            return
+        extension = 'events' if binary_log else 'txt'
+        self.file_name = os.path.join(
+            log_dir, "{}_simulation_pop_{}_vp_{}_infected_{}.{}".format(
+                self.virus.name, self.pop_size, self.vacc_percentage,
+                self.initial_infected, extension))
+        if binary_log:
+            self.logger = BinaryLogger(self.file_name, async_write=async_log)
+        else:
+            self.logger = Logger(self.file_name, async_write=async_log)
+
     def get_infected(self):
         '''Helper function that returns a list of alive infected people'''
         alive_infected = list()
@@ -75,7 +121,7 @@ class Simulation(object):
     def random_infected(self, total):
         """Return a list of indices of people to vaccinate."""
         random_infected = [
-            total.pop(random.randint(0, len(total)-1)
+            total.pop(self.rng.randint(0, len(total)-1)
                       ) for i in range(self.initial_infected)
         ]
         return random_infected
@@ -92,20 +138,86 @@ class Simulation(object):
         """
         population = list()
         number_vaccinated = round(self.vacc_percentage * self.pop_size)
-        total = random.sample(range(self.pop_size), number_vaccinated +
-                              self.initial_infected)
+        total = self.rng.sample(range(self.pop_size), number_vaccinated +
+                                self.initial_infected)
         indices_infected = self.random_infected(total)
         indices_vaccinated = total
         self.total_infected += self.initial_infected
+        # sets make each membership test O(1), instead of a scan of the list
+        vaccinated = set(indices_vaccinated)
+        infected = set(indices_infected)
         for index in range(self.pop_size):
-            if index in indices_vaccinated and index not in indices_infected:
-                population.insert(index, Person(index, True))
-            elif index not in indices_vaccinated and index in indices_infected:
-                population.insert(index, Person(index, False, self.virus))
+            if index in infected:
+                population.append(Person(index, False, self.virus))
+            elif index in vaccinated:
+                population.append(Person(index, True))
             else:
-                population.insert(index, Person(index, False))
+                population.append(Person(index, False))
         return population
 
+    def _count_population(self):
+        """Set the running tallies of the population with one full pass.
+
+           The tallies are then kept up to date as people change state in
+           interaction() and time_step(), so reading them is O(1). The same
+           pass rebuilds the index of living people used to sample contacts.
+
+        """
+        self.alive_num = 0
+        self.vacc_num = 0
+        self.infected_num = 0
+        self.neither_num = 0
+        # living people in no particular order, and each one's position in it
+        self.living = list()
+        self.living_index = [-1] * len(self.population)
+        for person in self.population:
+            if not person.is_alive:
+                continue
+            self.living_index[person._id] = len(self.living)
+            self.living.append(person)
+            self.alive_num += 1
+            if person.is_vaccinated:
+                self.vacc_num += 1
+            elif person.infection:
+                self.infected_num += 1
+            else:
+                self.neither_num += 1
+        self.total_dead = self.pop_size - self.alive_num
+
+    def _swap_living(self, i, j):
+        """Swap the living people at positions i and j of the index."""
+        living = self.living
+        living[i], living[j] = living[j], living[i]
+        self.living_index[living[i]._id] = i
+        self.living_index[living[j]._id] = j
+
+    def _remove_living(self, person):
+        """Remove a person who died from the index of living people, in O(1)
+           time by swapping them with the last entry.
+
+        """
+        self._swap_living(self.living_index[person._id], len(self.living) - 1)
+        self.living.pop()
+        self.living_index[person._id] = -1
+
+    def sample_contacts(self, person, k):
+        """Return k random living people other than the given person.
+
+           Runs in O(k) time: the person is swapped to the end of the index,
+           and the sample is drawn from the positions before it.
+
+           Parameters:
+           person(Person): the person whose contacts are being drawn
+           k(int): how many contacts to draw
+
+           Returns:
+           list: Person objects, sampled without replacement
+
+        """
+        last = len(self.living) - 1
+        self._swap_living(self.living_index[person._id], last)
+        return [self.living[i] for i in self.rng.sample(range(last), k)]
+
     def _simulation_should_continue(self):
         """The simulation should only end if the entire population is dead
             or everyone is vaccinated.
@@ -114,40 +226,37 @@ class Simulation(object):
                 bool: False for simulation should continue, True otherwise.
 
         """
-        # find the number of people who are both alive and vaccinated
-        alive_vacc = 0
-        for person in self.population:
-            if person.is_alive and person.is_vaccinated:
-                alive_vacc += 1
-        # make decision
-        return (self.total_dead + alive_vacc + self.get_neither() >=
+        return (self.total_dead + self.vacc_num + self.neither_num >=
                 self.pop_size)
 
     def get_alive_num(self):
         """Return the number of alive people in the population."""
-        alive_num = 0
-        for person in self.population:
-            if person.is_alive:
-                alive_num += 1
-        return alive_num
+        return self.alive_num
+
+    def get_vaccinated_num(self):
+        """Return the number of alive people who are vaccinated."""
+        return self.vacc_num
 
     def get_neither(self):
         """Return the number of alive people who are neither vaccinated nor
            infected."""
-        neither = 0
-        alive = self.get_alive()
-        for person in alive:
-            if not person.infection and not person.is_vaccinated:
-                neither += 1
-        return neither
+        return self.neither_num
 
     def get_dead(self):
         """Return number of dead people."""
-        dead = 0
-        for person in self.population:
-            if not person.is_alive:
-                dead += 1
-        return dead
+        return self.total_dead
+
+    def _step_report(self, time_step_counter):
+        """Return a verbal report of the results of this time step."""
+        return (f"Time step: {time_step_counter}, " +
+                f"total infected: {self.total_infected}, " +
+                f"current infected: {self.current_infected()}," +
+                f" vaccinated %: {self.vacc_percentage}, " +
+                f"dead: {self.total_dead},  " +
+                f"total vaccinated: {self.get_vaccinated_num()}, " +
+                f"alive: {self.get_alive_num()}, " +
+                f"uninfected: {self.current_infected()} " +
+                f"uninteracted {self.get_neither()}")
 
     def run(self, visualizer):
         ''' This method should run the simulation until all requirements for
@@ -158,43 +267,29 @@ class Simulation(object):
         simulation_should_continue = 0
         should_continue = None
 
-        assert self.population[0]._id == 0
         print(f"Time step 0, Total infected: {self.total_infected}, " +
               f"current infected: {self.current_infected()}, " +
               f"vaccinated percentage: {self.vacc_percentage}, " +
               f"dead: {self.total_dead}")
 
-        while True:
-            self.time_step(time_step_counter)
-            # create a list of alive persons
-            alive = self.get_alive()
-            # create a list of vaccinated persons
-            vaccinated = []
-            for person in self.population:
-                if person in alive and person.is_vaccinated:
-                    vaccinated.append(person)
-            # create a list of uninfected persons
-            uninfected = []
-            for person in alive:
-                if person not in vaccinated and person.infection:
-                    uninfected.append(person)
-            print(f"Time step: {time_step_counter}, " +
-                  f"total infected: {self.total_infected}, " +
-                  f"current infected: {self.current_infected()} vaccinated %: "
-                  + f"{self.vacc_percentage}, dead: {self.total_dead},  " +
-                  f"total vaccinated: {len(vaccinated)}, " +
-                  f"alive: {len(alive)}, uninfected: {len(uninfected)} " +
-                  f"uninteracted {self.get_neither()}")
-            visualizer.bar_graph(time_step_counter,
-                                 self.vacc_percentage * self.get_alive_num(),
-                                 self.current_infected(),
-                                 self.get_dead(),
-                                 self.get_neither())
-            if self._simulation_should_continue():
-                simulation_should_continue += 1
-                break
-
-            time_step_counter += 1
+        # the log is closed even if a step fails, so nothing is lost
+        try:
+            while True:
+                self.time_step(time_step_counter)
+                print(self._step_report(time_step_counter))
+                visualizer.bar_graph(time_step_counter,
+                                     (self.vacc_percentage *
+                                      self.get_alive_num()),
+                                     self.current_infected(),
+                                     self.get_dead(),
+                                     self.get_neither())
+                if self._simulation_should_continue():
+                    simulation_should_continue += 1
+                    break
+
+                time_step_counter += 1
+        finally:
+            self.logger.close()
         print(f'The simulation has ended after {time_step_counter} turns.',)
 
     def time_step(self, time_step_counter):
@@ -215,23 +310,27 @@ class Simulation(object):
         dead_this_step = 0
         for person in self.population:
             if person.infection and person.is_alive:
-                sampling = random.sample(self.get_alive(person._id), 100)
-                interaction_sample = sampling
+                interaction_sample = self.sample_contacts(person, 100)
                 for random_person in interaction_sample:
                     self.interaction(person, random_person)
-                did_survive = person.did_survive_infection()
-                # self.logger.log_infection_survival(person, did_survive)
-                if not did_survive:
+                did_survive = person.did_survive_infection(self.rng)
+                self.logger.log_infection_survival(person, not did_survive)
+                self.infected_num -= 1
+                if did_survive:
+                    self.vacc_num += 1
+                else:
                     dead_this_step += 1
                     self.total_dead += 1
+                    self.alive_num -= 1
+                    self._remove_living(person)
         infected_this_step = self._infect_newly_infected()
+        self.logger.log_time_step(time_step_counter, infected_this_step,
+                                  dead_this_step, self.current_infected(),
+                                  self.total_dead)
 
     def current_infected(self):
-        inf = 0
-        for person in self.population:
-            if person.infection and person.is_alive:
-                inf += 1
-        return inf
+        """Return the number of alive people who are infected."""
+        return self.infected_num
 
     def interaction(self, person, random_person):
         """This method should be called any time two living people are selected
@@ -247,12 +346,23 @@ class Simulation(object):
         assert person.is_alive is True
         assert random_person.is_alive is True
 
-        if random_person.infection is None and not random_person.is_vaccinated:
-            num = random.random()
-            if num < self.virus.repro_rate:
+        if random_person.is_vaccinated:
+            self.logger.log_interaction(person, random_person,
+                                        random_person_vacc=True)
+        elif random_person.infection is not None:
+            self.logger.log_interaction(person, random_person,
+                                        random_person_sick=True)
+        else:
+            num = self.rng.random()
+            did_infect = num < self.virus.repro_rate
+            if did_infect:
                 random_person.infection = self.virus
                 self.newly_infected.append(random_person._id)
                 self.total_infected += 1
+                self.neither_num -= 1
+                self.infected_num += 1
+            self.logger.log_interaction(person, random_person,
+                                        did_infect=did_infect)
 
     def _infect_newly_infected(self):
         """This method should iterate through the list of ._id stored in
@@ -263,7 +373,10 @@ class Simulation(object):
 
         infected_this_time = 0
         for people in self.newly_infected:
-            self.population[people].infection = self.virus
+            person = self.population[people]
+            # skip anyone whose infection already resolved during this step
+            if person.is_alive and not person.is_vaccinated:
+                person.infection = self.virus
             infected_this_time += 1
         self.newly_infected = []
         return infected_this_time
@@ -286,54 +399,36 @@ class Simulation(object):
         simulation_should_continue = 0
         should_continue = None
 
-        assert self.population[0]._id == 0
         init_report = (f"Time step 0, Total infected: {self.total_infected}, "
                        + f"current infected: {self.current_infected()}, " +
                          f"vaccinated percentage: {self.vacc_percentage}, " +
                          f"dead: {self.total_dead}")
         results.append((init_report,))
 
-        while True:
-            self.time_step(time_step_counter)
-            # create a list of alive persons
-            alive = self.get_alive()
-            # create a list of vaccinated persons
-            vaccinated = []
-            for person in self.population:
-                if person in alive and person.is_vaccinated:
-                    vaccinated.append(person)
-            # create a list of uninfected persons
-            uninfected = []
-            for person in alive:
-                if person not in vaccinated and person.infection:
-                    uninfected.append(person)
-            # store the text-based output in a str
-            step_report = (f"Time step: {time_step_counter}, " +
-                           f"total infected: {self.total_infected}, " +
-                           f"current infected: {self.current_infected()}," +
-                           f" vaccinated %: "
-                           + f"{self.vacc_percentage}, " +
-                           f"dead: {self.total_dead},  " +
-                           f"total vaccinated: {len(vaccinated)}, " +
-                           f"alive: {len(alive)}, " +
-                           f"uninfected: {len(uninfected)} " +
-                           f"uninteracted {self.get_neither()}")
-            visual = visualizer.bar_graph(time_step_counter,
-                                          (self.vacc_percentage *
-                                           self.get_alive_num()),
-                                          self.current_infected(),
-                                          self.get_dead(),
-                                          self.get_neither())
-            # associate the str and graph for this step
-            group_report = (step_report, visual)
-            results.append(group_report)
-            # decide to continue
-            if self._simulation_should_continue():
-                simulation_should_continue += 1
-                final_report = (f'The simulation has ended after ' +
-                                f'{time_step_counter} turns.',)
-                results.append(final_report)
-                break
-
-            time_step_counter += 1
+        # the log is closed even if a step fails, so nothing is lost
+        try:
+            while True:
+                self.time_step(time_step_counter)
+                # store the text-based output in a str
+                step_report = self._step_report(time_step_counter)
+                visual = visualizer.bar_graph(time_step_counter,
+                                              (self.vacc_percentage *
+                                               self.get_alive_num()),
+                                              self.current_infected(),
+                                              self.get_dead(),
+                                              self.get_neither())
+                # associate the str and graph for this step
+                group_report = (step_report, visual)
+                results.append(group_report)
+                # decide to continue
+                if self._simulation_should_continue():
+                    simulation_should_continue += 1
+                    final_report = (f'The simulation has ended after ' +
+                                    f'{time_step_counter} turns.',)
+                    results.append(final_report)
+                    break
+
+                time_step_counter += 1
+        finally:
+            self.logger.close()
         return results
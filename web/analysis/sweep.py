@@ -0,0 +1,153 @@
+import argparse
+import csv
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .virus import Virus
+from .simulation import Simulation
+from .array_simulation import ArraySimulation
+
+# Runs the same virus over a grid of population parameters, spreading the
+# simulations across every core of the machine.
+
+ENGINES = {
+    'array': ArraySimulation,
+    'object': Simulation,
+}
+# columns of the table of results, in order
+FIELDS = [
+    'pop_size',
+    'vacc_percentage',
+    'initial_infected',
+    'replicate',
+    'seed',
+    'steps',
+    'total_infected',
+    'dead',
+    'alive',
+    'vaccinated',
+    'uninteracted',
+]
+
+
+def parameter_grid(pop_sizes, vacc_percentages, initial_infected,
+                   replicates=1, seed=None):
+    """Return one set of parameters for every combination of the given
+       values, repeated for each replicate.
+
+       Every run is given its own seed, spawned from the seed of the sweep,
+       so runs are reproducible and their random streams do not overlap.
+
+       Returns:
+       list: dicts of keyword arguments for run_simulation
+
+    """
+    combinations = list(itertools.product(pop_sizes, vacc_percentages,
+                                          initial_infected,
+                                          range(replicates)))
+    seeds = np.random.SeedSequence(seed).spawn(len(combinations))
+    return [
+        {
+            'pop_size': pop_size,
+            'vacc_percentage': vacc_percentage,
+            'initial_infected': infected,
+            'replicate': replicate,
+            'seed': int(child.generate_state(1)[0]),
+        } for (pop_size, vacc_percentage, infected, replicate), child
+        in zip(combinations, seeds)
+    ]
+
+
+def run_simulation(virus, engine='array', **params):
+    """Run one simulation until it ends, and return a row of its results.
+
+       Parameters:
+       virus(Virus): the virus spreading through the population
+       engine(str): a key of ENGINES, picking the Simulation class to use
+       params(dict): the parameters made by parameter_grid
+
+       Returns:
+       dict: the final state of the population, keyed by FIELDS
+
+    """
+    # only the final state is kept, so the run writes no log
+    sim = ENGINES[engine](params['pop_size'], params['vacc_percentage'],
+                          virus, params['initial_infected'],
+                          seed=params['seed'], log_dir=None)
+    steps = 0
+    while True:
+        steps += 1
+        sim.time_step(steps)
+        if sim._simulation_should_continue():
+            break
+    row = dict(params)
+    row.update({
+        'steps': steps,
+        'total_infected': sim.total_infected,
+        'dead': sim.get_dead(),
+        'alive': sim.get_alive_num(),
+        'vaccinated': sim.get_vaccinated_num(),
+        'uninteracted': sim.get_neither(),
+    })
+    return row
+
+
+def run_sweep(virus, grid, engine='array', max_workers=None):
+    """Run a simulation for every set of parameters in the grid, in parallel.
+
+       Parameters:
+       virus(Virus): the virus spreading through each population
+       grid(list): the parameters of each run, made by parameter_grid
+       engine(str): a key of ENGINES, picking the Simulation class to use
+       max_workers(int): number of processes, defaults to the number of cores
+
+       Returns:
+       list: one row of results per run, in the same order as the grid
+
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_simulation, virus, engine, **params)
+                   for params in grid]
+        return [future.result() for future in futures]
+
+
+def write_results(rows, file):
+    """Write the rows of a sweep as CSV, with one column per field."""
+    writer = csv.DictWriter(file, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def parse_args(args):
+    """Return the command line arguments of a sweep."""
+    parser = argparse.ArgumentParser(
+        description='Run a virus over a grid of population parameters.')
+    parser.add_argument('virus_name')
+    parser.add_argument('mortality_rate', type=float)
+    parser.add_argument('repro_rate', type=float)
+    parser.add_argument('--pop-size', type=int, nargs='+', required=True)
+    parser.add_argument('--vacc-percentage', type=float, nargs='+',
+                        required=True)
+    parser.add_argument('--initial-infected', type=int, nargs='+',
+                        default=[1])
+    parser.add_argument('--replicates', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='array')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None,
+                        help='CSV file to write, instead of stdout.')
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    virus = Virus(args.virus_name, args.repro_rate, args.mortality_rate)
+    grid = parameter_grid(args.pop_size, args.vacc_percentage,
+                          args.initial_infected, args.replicates, args.seed)
+    rows = run_sweep(virus, grid, args.engine, args.workers)
+    if args.output is None:
+        write_results(rows, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as file:
+            write_results(rows, file)
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from .virus import Virus
+from .array_simulation import ArraySimulation
+from .logger import read_events, event_counts, INFECTED, DIED
+from . import visualizer
+
+
+class TestArraySimulation(unittest.TestCase):
+    def setUp(self):
+        """Write the logs of each test in a directory of its own."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_dir = directory.name
+
+    def test__init__(self):
+        """Test the population arrays are filled in at instantiation."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = ArraySimulation(1000, 0.05, virus, 10, log_dir=self.log_dir)
+
+        assert sim.pop_size == 1000
+        assert sim.initial_infected == 10
+        assert len(sim.is_alive) == len(sim.is_vaccinated) == 1000
+        assert sim.get_alive_num() == 1000
+        assert sim.current_infected() == 10
+        assert sim.get_vaccinated_num() == 50
+        # nobody starts out both infected and vaccinated
+        assert not np.any(sim.is_infected & sim.is_vaccinated)
+        assert sim.get_neither() == 1000 - 10 - 50
+        assert sim.file_name == os.path.join(
+            self.log_dir, "HIV_simulation_pop_1000_vp_0.05_infected_10.txt")
+
+    def test_get_alive(self):
+        """Test get_alive only returns the ids of alive people."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = ArraySimulation(1000, 0.05, virus, log_dir=self.log_dir)
+        sim.is_alive[[3, 7]] = False
+        sim._count_population()
+
+        alive = sim.get_alive(5)
+        assert len(alive) == 997
+        assert 3 not in alive and 5 not in alive and 7 not in alive
+        assert sim.get_dead() == 2
+
+    def test_person_helpers(self):
+        """Test the helpers Simulation works on Persons with take ids."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = ArraySimulation(1000, 0.05, virus, 10, log_dir=self.log_dir)
+        assert list(sim.population) == list(range(1000))
+        assert list(sim.random_infected(np.arange(20, 0, -1))) == list(
+            range(20, 10, -1))
+        sim._remove_living(3)
+        sim._count_population()
+        assert sim.get_alive_num() == 999
+
+        contacts = sim.sample_contacts(5, 100)
+        assert len(contacts) == len(set(contacts)) == 100
+        assert 5 not in contacts and 3 not in contacts
+
+    def test_interaction(self):
+        """Only alive, unvaccinated, uninfected people can be infected."""
+        virus = Virus("HIV", 1, 0.3)
+        sim = ArraySimulation(1000, 0.5, virus, log_dir=self.log_dir)
+        vaccinated = np.flatnonzero(sim.is_vaccinated)[:5]
+        neither = np.flatnonzero(~sim.is_vaccinated & ~sim.is_infected)[:5]
+        infector = sim.get_infected()[:1]
+        contacts = np.concatenate((vaccinated, neither, neither))
+
+        sim.interaction(np.repeat(infector, len(contacts)), contacts)
+        assert np.all(sim.is_infected[neither])
+        assert not np.any(sim.is_infected[vaccinated])
+        # repeated contacts only count as one infection each
+        assert sim.total_infected == 1 + len(neither)
+        assert sorted(sim.newly_infected) == sorted(neither)
+
+    def test_did_survive_infection(self):
+        """Survivors become vaccinated, everyone else dies infected."""
+        virus = Virus("HIV", 0.8, 0.5)
+        sim = ArraySimulation(1000, 0.05, virus, 100, log_dir=self.log_dir)
+        infected = sim.get_infected()
+
+        survived = sim.did_survive_infection(infected)
+        assert np.all(sim.is_vaccinated[infected[survived]])
+        assert not np.any(sim.is_infected[infected[survived]])
+        assert not np.any(sim.is_alive[infected[~survived]])
+        assert np.all(sim.is_infected[infected[~survived]])
+
+    def test_simulation_should_continue(self):
+        """Test the simulation runs until nobody alive is infected."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = ArraySimulation(2000, 0.5, virus, log_dir=self.log_dir)
+        graph = visualizer.Visualizer("Number of Survivors",
+                                      ("Herd Immunity Defense Against "
+                                       + "Disease Spread"))
+        assert sim._simulation_should_continue() is False
+        sim.run_and_collect(graph)
+        assert sim._simulation_should_continue() is True
+        assert sim.current_infected() == 0
+        assert sim.get_dead() == sim.total_dead
+        assert (sim.get_alive_num() + sim.get_dead()) == sim.pop_size
+
+    def test_binary_log(self):
+        """Every infection and death of a run is recorded as an event."""
+        virus = Virus("HIV", 0.5, 0.3)
+        sim = ArraySimulation(2000, 0.5, virus, 5, seed=0, binary_log=True,
+                              log_dir=self.log_dir)
+        assert sim.file_name.endswith('.events')
+        step = 0
+        while not sim._simulation_should_continue():
+            step += 1
+            sim.time_step(step)
+        sim.logger.close()
+
+        _, events = read_events(sim.file_name)
+        counts = event_counts(events)
+        assert counts[:, INFECTED].sum() == sim.total_infected - 5
+        assert counts[:, DIED].sum() == sim.get_dead()
+        # nobody is infected twice
+        infected = events['target'][events['event'] == INFECTED]
+        assert len(np.unique(infected)) == len(infected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import unittest
+from .charts import *
+from .simulation import Simulation
+from .virus import Virus
+from . import visualizer
+
+
+class TestCharts(unittest.TestCase):
+    def test_chart_key(self):
+        """Charts drawn from the same inputs share one address."""
+        chart = (POPULATIONS, [1, 2, 3, 4], x_label(1), Y_LABEL, TITLE)
+        assert chart_key('png', *chart) == chart_key('png', *chart)
+        assert chart_key('png', *chart) != chart_key('svg', *chart)
+        other = (POPULATIONS, [1, 2, 3, 5], x_label(1), Y_LABEL, TITLE)
+        assert chart_key('png', *chart) != chart_key('png', *other)
+
+    def test_render(self):
+        """Every chart is drawn on the same Figure, replacing the last one."""
+        renderer = ChartRenderer()
+        png = renderer.render(POPULATIONS, [1, 2, 3, 4], x_label(1),
+                              Y_LABEL, TITLE)
+        assert png.startswith(b'\x89PNG')
+        figure = renderer.figure
+        svg = renderer.render(POPULATIONS, [4, 3, 2, 1], x_label(2),
+                              Y_LABEL, TITLE, 'svg')
+        assert b'<svg' in svg
+        assert renderer.figure is figure
+        # the bars of the first chart don't pile up under the second
+        assert len(renderer.axes.patches) == len(POPULATIONS)
+        assert renderer.axes.get_xlabel() == x_label(2)
+
+    def test_visualizer_graphs(self):
+        """Each step of a run keeps its own bar graph, to render later."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = Simulation(1000, 0.5, virus, 10, seed=1, log_dir=None)
+        graph = visualizer.Visualizer(Y_LABEL, TITLE)
+        results = sim.run_and_collect(graph)
+        graphs = [step[1] for step in results[1:-1]]
+        assert len(graphs) > 1
+        for step_id, step_graph in enumerate(graphs, start=1):
+            assert isinstance(step_graph, BarGraph)
+            assert step_graph.x_label == x_label(step_id)
+        assert graphs[0] != graphs[-1]
+        # the renderer takes a graph's fields as they are
+        assert graph.render(graphs[0]).startswith(b'\x89PNG')
+        assert graph.renderer.axes.get_xlabel() == x_label(1)
+
+    def test_lazy_import(self):
+        """Importing the visualizer doesn't import matplotlib or boto3."""
+        code = ("import sys, analysis.visualizer\n"
+                "assert 'matplotlib' not in sys.modules\n"
+                "assert 'boto3' not in sys.modules\n")
+        web_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', code], cwd=web_dir)
+        assert result.returncode == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import os
+import numpy as np
+from .virus import Virus
+from .web_simulation import WebSimulation
+from .ensemble import (
+    METRICS,
+    Ensemble,
+    P2Quantile,
+    RunningStats,
+    run_ensemble,
+    run_replicate
+)
+
+
+class TestEnsemble(unittest.TestCase):
+    def test_running_stats(self):
+        """Test the streaming mean and deviation match a full computation."""
+        values = np.random.default_rng(1).normal(10, 3, 1000)
+        stats = RunningStats()
+        for x in values:
+            stats.add(x)
+        assert stats.count == 1000
+        assert abs(stats.mean - values.mean()) < 1e-9
+        assert abs(stats.std() - values.std(ddof=1)) < 1e-9
+        low, high = stats.interval()
+        assert low < stats.mean < high
+
+    def test_p2_quantile(self):
+        """Test the streaming quantiles are close to the exact ones."""
+        values = np.random.default_rng(2).normal(0, 1, 10000)
+        for p in (0.05, 0.5, 0.95):
+            quantile = P2Quantile(p)
+            for x in values:
+                quantile.add(x)
+            assert abs(quantile.value() - np.quantile(values, p)) < 0.05
+        # with fewer than five observations, the quantile is exact
+        quantile = P2Quantile(0.5)
+        assert quantile.value() is None
+        for x in (3, 1, 2):
+            quantile.add(x)
+        assert quantile.value() == 2
+
+    def test_replicates_of_different_lengths(self):
+        """Test a replicate that ended early keeps its final values."""
+        def rows(*dead):
+            return [dict.fromkeys(METRICS, x) for x in dead]
+        ensemble = Ensemble()
+        ensemble.add(rows(1, 2))
+        ensemble.add(rows(3, 4, 6))
+        ensemble.add(rows(5))
+        summary = ensemble.summary()
+        assert summary['replicates'] == 3
+        assert len(summary['steps']) == 3
+        means = [step['dead']['mean'] for step in summary['steps']]
+        assert means == [3, 11 / 3, 13 / 3]
+        assert summary['steps'][2]['dead']['q50'] == 5
+
+    def test_run_replicate(self):
+        """Test a replicate steps like the engine of an Experiment."""
+        virus = Virus("HIV", 0.8, 0.3)
+        rows = run_replicate(virus, 1000, 0.5, 10, seed=7)
+        sim = WebSimulation(1000, 0.5, virus, 10, seed=7)
+        time_steps = sim.run_and_collect(None)[:-1]
+        assert len(rows) == len(time_steps)
+        for row, time_step in zip(rows, time_steps):
+            for metric in METRICS:
+                assert row[metric] == time_step[metric]
+
+    def test_run_ensemble(self):
+        """Test replicates run in parallel are summarized at every step."""
+        virus = Virus("HIV", 0.8, 0.3)
+        files = set(os.listdir('.'))
+        summary = run_ensemble(virus, 1000, 0.5, 10, replicates=6, seed=3,
+                               max_workers=2)
+        # replicates write no log
+        assert set(os.listdir('.')) == files
+        assert summary['replicates'] == 6
+        for step in summary['steps']:
+            for metric in METRICS:
+                values = step[metric]
+                assert values['ci_low'] <= values['mean'] <= values['ci_high']
+                assert values['q05'] <= values['q50'] <= values['q95']
+        # the same seed gives the same summary
+        assert run_ensemble(virus, 1000, 0.5, 10, replicates=6, seed=3,
+                            max_workers=2) == summary
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,9 @@ import unittest
 from .logger import *
 from .person import *
 import os
+import subprocess
+import sys
+import numpy as np
 
 
 class TestLogger(unittest.TestCase):
@@ -41,6 +44,7 @@ class TestLogger(unittest.TestCase):
         log_file.log_interaction(infector, person1, did_infect=True)
         log_file.log_interaction(infector, person2,  random_person_vacc=True)
         log_file.log_interaction(infector, person3, random_person_sick=True)
+        log_file.flush()
 
         lines = f.readlines()
         f.close()
@@ -65,6 +69,7 @@ class TestLogger(unittest.TestCase):
         f = open(file_name, 'r')
         log_file.log_infection_survival(person1, True)
         log_file.log_infection_survival(person2, False)
+        log_file.flush()
 
         lines = f.readlines()
         f.close()
@@ -92,6 +97,128 @@ class TestLogger(unittest.TestCase):
         assert lines[4] == "None people died in total by far.\n"
         assert lines[5] == "TIME STEP 15 ended, beginning TIME STEP 16.\n"
 
+    def test_buffered_writes(self):
+        """Lines are held in memory until the Logger is flushed or closed."""
+        file_name = 'test_buffered_writes.txt'
+        person1 = Person(1, False)
+        person2 = Person(2, False)
+
+        with Logger(file_name) as log_file:
+            log_file.write_metadata(100, 0.5, 'HIV', 0.4, 0.8)
+            log_file.log_interaction(person1, person2, did_infect=True)
+            # only the metadata has reached the disk
+            with open(file_name, 'r') as f:
+                assert len(f.readlines()) == 1
+            handle = log_file.file
+        # the same file handle was used for every line, and is now closed
+        assert handle.closed
+        assert log_file.file is None
+
+        with open(file_name, 'r') as f:
+            lines = f.readlines()
+        os.remove(file_name)
+        assert lines[1] == "1 infects 2\n"
+
+    def test_binary_logger(self):
+        """Events written in binary are read back as the same records."""
+        file_name = 'test_binary_logger.events'
+        infector = Person(0, False)
+        person1 = Person(1, False)
+        person2 = Person(2, True)
+
+        with BinaryLogger(file_name) as log_file:
+            log_file.write_metadata(100, 0.5, 'HIV', 0.4, 0.8)
+            log_file.log_interaction(infector, person1, did_infect=True)
+            log_file.log_interaction(infector, person2,
+                                     random_person_vacc=True)
+            log_file.log_time_step(1, 1, 0, 2, 0)
+            log_file.log_infection_survival(infector, True)
+            log_file.log_events(SURVIVED, np.array([1]), np.array([1]))
+
+        metadata, events = read_events(file_name)
+        assert metadata['pop_size'] == 100
+        assert metadata['virus_name'] == 'HIV'
+        assert events.tolist() == [
+            (1, 0, 1, INFECTED),
+            (1, 0, 2, VACCINATED),
+            (2, 0, 0, DIED),
+            (2, 1, 1, SURVIVED),
+        ]
+        counts = event_counts(events)
+        assert counts[1, INFECTED] == 1
+        assert counts[2, DIED] == counts[2, SURVIVED] == 1
+        del events
+        os.remove(file_name)
+
+    def test_async_write(self):
+        """A Logger writing from a background thread writes the same lines."""
+        file_name = 'test_async_write.txt'
+        person1 = Person(1, False)
+        person2 = Person(2, False)
+
+        with Logger(file_name, buffer_size=16, async_write=True) as log_file:
+            log_file.write_metadata(100, 0.5, 'HIV', 0.4, 0.8)
+            for _ in range(100):
+                log_file.log_interaction(person1, person2, did_infect=True)
+            assert isinstance(log_file.file, AsyncWriter)
+
+        with open(file_name, 'r') as f:
+            lines = f.readlines()
+        os.remove(file_name)
+        assert lines[0].startswith("Population size: 100\t")
+        assert lines[1:] == ["1 infects 2\n"] * 100
+
+    def test_async_write_at_exit(self):
+        """A Logger left open writes its lines when the interpreter exits."""
+        file_name = os.path.abspath('test_async_write_at_exit.txt')
+        script = (
+            "from analysis.logger import Logger\n"
+            "from analysis.person import Person\n"
+            f"log_file = Logger({file_name!r}, buffer_size=16, "
+            "async_write=True)\n"
+            "log_file.write_metadata(100, 0.5, 'HIV', 0.4, 0.8)\n"
+            "for _ in range(100):\n"
+            "    log_file.log_interaction(Person(1, False), Person(2, False),"
+            " did_infect=True)\n"
+        )
+        package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, '-c', script], cwd=package,
+                       check=True)
+        with open(file_name, 'r') as f:
+            lines = f.readlines()
+        os.remove(file_name)
+        assert lines[0].startswith("Population size: 100\t")
+        assert lines[1:] == ["1 infects 2\n"] * 100
+
+    def test_async_writer_error(self):
+        """An error in the writing thread is raised in the caller."""
+        file_name = 'test_async_writer_error.events'
+        writer = AsyncWriter(file_name, 'wb', chunk_size=1, queue_size=1)
+        # make the thread's next write fail
+        writer.file.close()
+        writer.write(b'event')
+        raised = False
+        try:
+            writer.close()
+        except ValueError:
+            raised = True
+        os.remove(file_name)
+        assert raised
+
+    def test_null_logger(self):
+        """A NullLogger takes every call of a Logger, and writes nothing."""
+        files = set(os.listdir('.'))
+        person1 = Person(1, False)
+        person2 = Person(2, False)
+        with NullLogger() as log_file:
+            log_file.write_metadata(100, 0.5, 'HIV', 0.4, 0.8)
+            log_file.log_interaction(person1, person2, did_infect=True)
+            log_file.log_infection_survival(person1, False)
+            log_file.log_time_step(1, 1, 0, 1, 0)
+            log_file.log_events(INFECTED, np.arange(3), np.arange(3))
+        assert log_file.file_name is None
+        assert set(os.listdir('.')) == files
+
 
 if __name__ == '__main__':
     unittest.main()
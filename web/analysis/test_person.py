@@ -1,5 +1,6 @@
 from .virus import Virus
 from .person import Person
+import random
 import unittest
 
 
@@ -16,6 +17,8 @@ class TestPerson:
         assert person.is_alive is True
         assert person.is_vaccinated is True
         assert person.infection is None
+        # attributes are kept in slots, not a __dict__
+        assert not hasattr(person, '__dict__')
 
     def test_not_vacc_person_instantiation(self):
         person = Person(2, False)
@@ -58,6 +61,15 @@ class TestPerson:
             assert person_sam.is_vaccinated is False
             assert person_sam.infection is virus
 
+    def test_did_survive_infection_with_rng(self):
+        # Create two people with the same infection
+        virus = Virus("Smallpox", 0.17, 0.59)
+        people = [Person(5, False, virus), Person(6, False, virus)]
+        # Resolve both infections with generators seeded the same way
+        outcomes = [person.did_survive_infection(random.Random(1))
+                    for person in people]
+        assert outcomes[0] == outcomes[1]
+
 
 if __name__ == '__main__':
     unittest.main()
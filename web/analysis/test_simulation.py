@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
 import random
 import sys
+import numpy as np
 from .person import Person
 from .logger import Logger
 from .virus import Virus
@@ -11,14 +14,20 @@ random.seed(42)
 
 
 class TestSimulation(unittest.TestCase):
+    def setUp(self):
+        """Write the logs of each test in a directory of its own."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log_dir = directory.name
+
     def test__init__(self):
         """Test values passed into Simulation instance properties at
            instantiation."""
         # test virus
         virus = Virus("HIV", 0.8, 0.3)
         # test instances with and without args for initial infected
-        sim_no_arg = Simulation(1000, 0.05, virus)
-        sim_yes_arg = Simulation(1000, 0.05, virus, 10)
+        sim_no_arg = Simulation(1000, 0.05, virus, log_dir=self.log_dir)
+        sim_yes_arg = Simulation(1000, 0.05, virus, 10, log_dir=self.log_dir)
 
         assert sim_no_arg.pop_size == sim_yes_arg.pop_size == 1000
         assert sim_no_arg.vacc_percentage == sim_yes_arg.vacc_percentage == .05
@@ -26,10 +35,10 @@ class TestSimulation(unittest.TestCase):
         assert sim_yes_arg.initial_infected == 10
         assert sim_no_arg.virus == sim_yes_arg.virus == virus
         # self.population cannot be tested, because assigned using random
-        assert sim_no_arg.file_name == ("HIV_simulation_pop_1000_vp_0.05_" +
-                                        "infected_1.txt")
-        assert sim_yes_arg.file_name == ("HIV_simulation_pop_1000_vp_0.05_" +
-                                         "infected_10.txt")
+        assert sim_no_arg.file_name == os.path.join(
+            self.log_dir, "HIV_simulation_pop_1000_vp_0.05_infected_1.txt")
+        assert sim_yes_arg.file_name == os.path.join(
+            self.log_dir, "HIV_simulation_pop_1000_vp_0.05_infected_10.txt")
         test_file_no_arg = open(sim_no_arg.file_name, "r")
         assert test_file_no_arg.read() == ("Population size: 1000" +
                                            "\tVaccination percentage: 0.05	" +
@@ -42,7 +51,7 @@ class TestSimulation(unittest.TestCase):
         """Test list returned by get_infected to ensure it only contains
            people who are both alive and infected."""
         virus = Virus("HIV", 0.8, 0.3)
-        sim = Simulation(1000, 0.05, virus)
+        sim = Simulation(1000, 0.05, virus, log_dir=self.log_dir)
         alive_infected = sim.get_infected()  # stores value returned by method
 
         num_alive_infected = 0
@@ -54,7 +63,7 @@ class TestSimulation(unittest.TestCase):
     def test_get_alive(self):
         """Test output of get_alive to ensure only contains alive people."""
         virus = Virus("HIV", 0.8, 0.3)
-        sim = Simulation(1000, 0.05, virus)
+        sim = Simulation(1000, 0.05, virus, log_dir=self.log_dir)
         alive = sim.get_alive()
 
         num_alive = 0
@@ -67,7 +76,7 @@ class TestSimulation(unittest.TestCase):
         """Test output of random_infected to ensure all elements in
            list are integer values."""
         virus = Virus("HIV", 0.8, 0.3)
-        sim = Simulation(1000, 0.05, virus)
+        sim = Simulation(1000, 0.05, virus, log_dir=self.log_dir)
         number_vaccinated = round(sim.vacc_percentage * sim.pop_size)
         total = random.sample(range(sim.pop_size), number_vaccinated +
                               sim.initial_infected)
@@ -88,7 +97,7 @@ class TestSimulation(unittest.TestCase):
           5. and the population is the right size.
         """
         virus = Virus("HIV", 0.8, 0.3)
-        sim = Simulation(1000, 0.05, virus)
+        sim = Simulation(1000, 0.05, virus, log_dir=self.log_dir)
 
         sim_population = sim.population
         # bools to store that each condition is being met
@@ -138,7 +147,7 @@ class TestSimulation(unittest.TestCase):
         # Test scenarios that should cause simulation to continue
         # Scenario 1: just after 1 time step with HIV virus
         virus = Virus("HIV", 0.8, 0.3)
-        sim = Simulation(2000, 0.5, virus)
+        sim = Simulation(2000, 0.5, virus, log_dir=self.log_dir)
         graph = visualizer.Visualizer("Number of Survivors",
                                          ("Herd Immunity Defense Against "
                                           + "Disease Spread"))
@@ -152,6 +161,8 @@ class TestSimulation(unittest.TestCase):
             person.is_alive = False
             sim.total_dead += 1
             person.is_vaccinated = False
+        # the tallies only follow changes made by the simulation itself
+        sim._count_population()
         assert sim._simulation_should_continue() is True
 
         # Scenario 2: vaccinate everyone
@@ -160,19 +171,60 @@ class TestSimulation(unittest.TestCase):
             person.infection = None
             person.is_vaccinated = True
         sim.total_dead = 0
+        sim._count_population()
         assert sim._simulation_should_continue() is True
 
+    def test_sample_contacts(self):
+        """Test contacts are distinct, living, and never the person."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = Simulation(2000, 0.5, virus, log_dir=self.log_dir)
+        person = sim.population[7]
+        sim.population[3].is_alive = False
+        sim._count_population()
+
+        contacts = sim.sample_contacts(person, 100)
+        assert len(contacts) == len(set(contacts)) == 100
+        assert person not in contacts
+        assert sim.population[3] not in contacts
+        # the index of living people stays in step with the population
+        sim.time_step(1)
+        assert len(sim.living) == sim.get_alive_num()
+        for position, living_person in enumerate(sim.living):
+            assert living_person.is_alive
+            assert sim.living_index[living_person._id] == position
+
+    def test_seed(self):
+        """Test each simulation draws from its own, reproducible stream."""
+        virus = Virus("HIV", 0.8, 0.3)
+        children = np.random.SeedSequence(42).spawn(2)
+        first = Simulation(1000, 0.5, virus, 10, seed=children[0],
+                           log_dir=self.log_dir)
+        same = Simulation(1000, 0.5, virus, 10, seed=children[0],
+                          log_dir=self.log_dir)
+        other = Simulation(1000, 0.5, virus, 10, seed=children[1],
+                           log_dir=self.log_dir)
+        # drawing from one stream does not disturb another
+        random.random()
+        other.time_step(1)
+        first.time_step(1)
+        same.time_step(1)
+        assert ([person.is_alive for person in first.population] ==
+                [person.is_alive for person in same.population])
+        assert first.total_infected == same.total_infected
+        assert ([person.is_vaccinated for person in first.population] !=
+                [person.is_vaccinated for person in other.population])
+
     def test_get_alive_num(self):
         """Test the get_alive_num method."""
         virus = Virus("HIV", 0.8, 0.3)
-        sim = Simulation(2000, 0.5, virus)
+        sim = Simulation(2000, 0.5, virus, log_dir=self.log_dir)
 
         alive_num = sim.get_alive_num()
         assert alive_num == sim.pop_size
 
     def test_get_neither(self):
         virus = Virus("HIV", 0.8, 0.3)
-        sim = Simulation(2000, 0.5, virus)
+        sim = Simulation(2000, 0.5, virus, log_dir=self.log_dir)
 
         # find number of alive people not vaccinated or infected
         neither = 0
@@ -185,7 +237,7 @@ class TestSimulation(unittest.TestCase):
     def test_get_dead(self):
         """Test the get_dead method."""
         virus = Virus("HIV", 0.8, 0.3)
-        sim = Simulation(2000, 0.5, virus)
+        sim = Simulation(2000, 0.5, virus, log_dir=self.log_dir)
 
         dead_num = sim.get_dead()
         assert dead_num == 0
@@ -0,0 +1,60 @@
+import unittest
+import io
+import os
+from .virus import Virus
+from .sweep import (
+    FIELDS,
+    parameter_grid,
+    run_simulation,
+    run_sweep,
+    write_results
+)
+
+
+class TestSweep(unittest.TestCase):
+    def test_parameter_grid(self):
+        """Test every combination is run once per replicate, with distinct
+           seeds."""
+        grid = parameter_grid([500, 1000], [0.1, 0.5, 0.9], [1, 10],
+                              replicates=2, seed=42)
+        assert len(grid) == 2 * 3 * 2 * 2
+        assert len({params['seed'] for params in grid}) == len(grid)
+        assert grid[0] == {'pop_size': 500, 'vacc_percentage': 0.1,
+                           'initial_infected': 1, 'replicate': 0,
+                           'seed': grid[0]['seed']}
+        # the same seed for the sweep gives the same seeds for each run
+        assert parameter_grid([500, 1000], [0.1, 0.5, 0.9], [1, 10],
+                              replicates=2, seed=42) == grid
+
+    def test_run_simulation(self):
+        """Test a run accounts for everyone in the population."""
+        virus = Virus("HIV", 0.8, 0.3)
+        params = parameter_grid([1000], [0.5], [10], seed=1)[0]
+        files = set(os.listdir('.'))
+        row = run_simulation(virus, **params)
+        # runs of a sweep write no log
+        assert set(os.listdir('.')) == files
+        assert set(row) == set(FIELDS)
+        assert row['alive'] + row['dead'] == 1000
+        assert row['alive'] == row['vaccinated'] + row['uninteracted']
+        # the same seed reproduces the same run
+        assert run_simulation(virus, **params) == row
+
+    def test_run_sweep(self):
+        """Test runs in separate processes come back in order, as a table."""
+        virus = Virus("HIV", 0.8, 0.3)
+        grid = parameter_grid([500], [0.2, 0.8], [1, 5], seed=7)
+        rows = run_sweep(virus, grid, max_workers=2)
+        assert len(rows) == len(grid)
+        for params, row in zip(grid, rows):
+            assert row['seed'] == params['seed']
+            assert row['vacc_percentage'] == params['vacc_percentage']
+        file = io.StringIO()
+        write_results(rows, file)
+        lines = file.getvalue().splitlines()
+        assert lines[0] == ','.join(FIELDS)
+        assert len(lines) == len(rows) + 1
+
+
+if __name__ == "__main__":
+    unittest.main()
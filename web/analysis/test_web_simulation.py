@@ -0,0 +1,50 @@
+import unittest
+from .virus import Virus
+from .web_simulation import WebSimulation
+
+
+class TestWebSimulation(unittest.TestCase):
+    def test_store_vacc_persons(self):
+        """Test only people both alive and vaccinated are returned."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = WebSimulation(1000, 0.5, virus, 10)
+        sim.population[0].is_alive = False
+        alive = sim.get_alive()
+
+        vaccinated = sim.store_vacc_persons(alive)
+        for person in vaccinated:
+            assert person.is_alive and person.is_vaccinated
+        expected = [person for person in alive if person.is_vaccinated]
+        assert vaccinated == expected
+
+    def test_store_uninfected_persons(self):
+        """Test the report matches the alive, unvaccinated infected people."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = WebSimulation(1000, 0.5, virus, 10)
+        alive = sim.get_alive()
+        vaccinated = sim.store_vacc_persons(alive)
+
+        uninfected = sim.store_uninfected_persons(alive, vaccinated)
+        assert len(uninfected) == sim.current_infected() == 10
+        for person in uninfected:
+            assert not person.is_vaccinated and person.infection
+
+    def test_make_report(self):
+        """Test the report of a step agrees with a full population scan."""
+        virus = Virus("HIV", 0.8, 0.3)
+        sim = WebSimulation(1000, 0.5, virus, 10)
+        sim.time_step(1)
+        report = sim.make_report(1)
+
+        alive = sim.get_alive()
+        vaccinated = sim.store_vacc_persons(alive)
+        uninfected = sim.store_uninfected_persons(alive, vaccinated)
+        assert report[0] == 1
+        assert report[4] == len(vaccinated)
+        assert report[5] == len(alive)
+        assert report[6] == len(uninfected)
+        assert report[3] == sim.pop_size - len(alive)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,7 @@
-import matplotlib.pyplot as plt
-from matplotlib.pyplot import figure
-import io
 import numpy as np
-from pylab import *
-from matplotlib.backends.backend_agg import FigureCanvasAgg
-from matplotlib.backends.backend_pdf import PdfPages
-import boto3
-
-plt.rcdefaults()
+# matplotlib is only imported once the first bar graph is rendered, so
+# importing this module stays cheap for code that never draws, like the web app
+from . import charts
 
 '''
 Info for using matplotlib and numpy came from this tutorials:
@@ -17,17 +11,19 @@ https://pythonspot.com/matplotlib-bar-chart/
 
 class Visualizer:
     def __init__(self, y_label, title):
-        '''Set up object.'''
+        '''Set up object, with one Figure that every bar graph is drawn on.'''
         self.y_label = y_label
         self.x_label = ""
         self.title = title
+        self.graph = None
+        self.renderer = charts.ChartRenderer()
 
     def set_x_label(self, time_step):
         '''Define x_label for bar graph every time step.'''
-        self.x_label = f'Population Sizes During Time Step {time_step}'
+        self.x_label = charts.x_label(time_step)
 
     def bar_graph(self, time_step, vacc, infected, dead, neither):
-        """Return self, with metadata about graph initialized.
+        """Return the bar graph of a time step, to be rendered later.
            Optimized to work in the web UI.
 
            Parameters:
@@ -38,18 +34,27 @@ class Visualizer:
            neither(int): number of miscellaneous people
 
            Return:
-           name(str): name of the png file created, which shows the bar graph
+           BarGraph: the inputs of the graph, which can be passed to render
         """
-        self.populations = ["Vaccinated", "Infected", "Dead", "No Interaction"]
+        self.populations = list(charts.POPULATIONS)
         self.y_pos = np.arange(len(self.populations))
         self.num_alive = [vacc, infected, dead, neither]
         self.set_x_label(time_step)
-        plt.switch_backend('Agg')  # switching off the main thread
-        plt.bar(self.y_pos, self.num_alive, align='center', alpha=0.5)
-        plt.xticks(self.y_pos, self.populations)
-        plt.ylabel(self.y_label)
-        plt.xlabel(self.x_label)
-        plt.title(self.title)
+        self.graph = charts.BarGraph(self.populations, self.num_alive,
+                                     self.x_label, self.y_label, self.title)
+        return self.graph
+
+    def render(self, graph=None, image_format='png'):
+        """Return a bar graph as an image.
+
+           Parameters:
+           graph(BarGraph): the graph to draw, by default the last one made
+           image_format(str): either 'png' or 'svg'
+
+           Returns:
+           bytes: the image
+        """
+        return self.renderer.render(*(graph or self.graph), image_format)
 
 
 class WebVisualizer(Visualizer):
@@ -72,31 +77,11 @@ class WebVisualizer(Visualizer):
            experiment(Experiment): the related Experiment model
 
            Return:
-           name(str): name of the png file created, which shows the bar graph
+           BarGraph: the inputs of the graph, which can be passed to render
         """
-        self.populations = ["Vaccinated", "Infected", "Dead", "No Interaction"]
-        self.y_pos = np.arange(len(self.populations))
-        self.num_alive = [vacc, infected, dead, neither]
-        self.set_x_label(time_step)
-        plt.switch_backend('Agg')  # switching off the main thread
-        plt.bar(self.y_pos, self.num_alive, align='center', alpha=0.5)
-        plt.xticks(self.y_pos, self.populations)
-        plt.ylabel(self.y_label)
-        plt.xlabel(self.x_label)
-        plt.title(self.title)
-        # send file to AWS S3
-        bucket_name = 'herd-immunity-files'
-        file_name = ('static/images/matplot' + str(experiment.title) +
-                     str(time_step) + '.png')
-        s3client = boto3.client('s3')
-        # s3client.put_object(Bucket=bucket_name, Key=file_name, Body=plt)
-        # plt.savefig(name)
-        # plt.close()
-        return plt
+        return super().bar_graph(time_step, vacc, infected, dead, neither)
 
 
 if __name__ == "__main__":
-    graph = Visualizer("Number of Survivors",
-                       ("Herd Immunity Defense Against Disease " +
-                        "Spread"))
+    graph = Visualizer(charts.Y_LABEL, charts.TITLE)
     graph.bar_graph(1)
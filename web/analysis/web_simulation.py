@@ -1,18 +1,18 @@
-import random
 import sys
 from .person import Person
-from .logger import Logger
+from .logger import NullLogger
 from .virus import Virus
 from . import visualizer
 from .simulation import Simulation
 from data_structures.mwaytree import MWayTree, MWayTreeNode
-random.seed(42)
 
 
 class WebSimulation(Simulation):
     '''A Simulation class especially made to work with Django models.'''
-    def __init__(self, pop_size, vacc_percentage, virus, initial_infected=1):
-        '''Same as super class initializer, except no use of Logger.'''
+    def __init__(self, pop_size, vacc_percentage, virus, initial_infected=1,
+                 seed=None):
+        '''Same as super class initializer, except nothing is logged.'''
+        self._seed_rng(seed)
         self.population = []  # List of Person objects
         self.pop_size = pop_size  # Int
         self.next_person_id = pop_size  # Int
@@ -21,8 +21,10 @@ class WebSimulation(Simulation):
         self.total_infected = MWayTree(virus_name=virus.name)
         self.vacc_percentage = vacc_percentage  # float between 0 and 1
         self.total_dead = 0  # Int
+        self.logger = NullLogger()
         self.newly_infected = []
         self.population = self._create_population()
+        self._count_population()
 
     def _create_population(self):
         '''This method will create the initial population.
@@ -37,21 +39,24 @@ class WebSimulation(Simulation):
         # section off population demographics
         population = list()
         number_vaccinated = round(self.vacc_percentage * self.pop_size)
-        total = random.sample(range(self.pop_size), number_vaccinated +
-                              self.initial_infected)
+        total = self.rng.sample(range(self.pop_size), number_vaccinated +
+                                self.initial_infected)
         # load the initially infected into the tree of infected persons
         indices_infected = self.random_infected(total)
         for id in indices_infected:
             self.total_infected.insert(self.total_infected.root.id, id)
         # form a list of Persons for the whole population
         indices_vaccinated = total
+        # sets make each membership test O(1), instead of a scan of the list
+        vaccinated = set(indices_vaccinated)
+        infected = set(indices_infected)
         for index in range(self.pop_size):
-            if index in indices_vaccinated and index not in indices_infected:
-                population.insert(index, Person(index, True))
-            elif index not in indices_vaccinated and index in indices_infected:
-                population.insert(index, Person(index, False, self.virus))
+            if index in infected:
+                population.append(Person(index, False, self.virus))
+            elif index in vaccinated:
+                population.append(Person(index, True))
             else:
-                population.insert(index, Person(index, False))
+                population.append(Person(index, False))
         return population
 
     def store_vacc_persons(self, alive):
@@ -65,11 +70,10 @@ class WebSimulation(Simulation):
                           vaccinated
 
         """
-        persons = list()
-        for person in self.population:
-            if person in alive and person.is_vaccinated:
-                persons.append(person)
-        return persons
+        # compare ids in a set, so each membership test is O(1)
+        alive_ids = {person._id for person in alive}
+        return [person for person in self.population
+                if person._id in alive_ids and person.is_vaccinated]
 
     def store_uninfected_persons(self, alive, vaccinated):
         """Return people who are alive, not vaccinated, and not infected.
@@ -83,11 +87,9 @@ class WebSimulation(Simulation):
                           uninfected, nor vaccinated
 
         """
-        persons = list()
-        for person in alive:
-            if person not in vaccinated and person.infection:
-                persons.append(person)
-        return persons
+        vaccinated_ids = {person._id for person in vaccinated}
+        return [person for person in alive
+                if person._id not in vaccinated_ids and person.infection]
 
     def make_report(self, counter):
         """Return a report of the results of this time step.
@@ -99,21 +101,15 @@ class WebSimulation(Simulation):
            str: a verbal record of the TimeStep results
 
         """
-        # create a list of alive persons
-        alive = self.get_alive()
-        # create a list of vaccinated persons
-        vaccinated = self.store_vacc_persons(alive)
-        # create a list of uninfected persons
-        uninfected = self.store_uninfected_persons(alive, vaccinated)
-        # return values to init TimeStep fields
+        # read the running tallies, rather than rescanning the population
         return [
             counter,
             self.total_infected.size,
             self.current_infected(),
             self.total_dead,
-            len(vaccinated),
-            len(alive),
-            len(uninfected),
+            self.get_vaccinated_num(),
+            self.get_alive_num(),
+            self.current_infected(),
             self.get_neither()
         ]
 
@@ -165,11 +161,13 @@ class WebSimulation(Simulation):
             pass
         elif (random_person.infection is None and
               not random_person.is_vaccinated):
-            num = random.random()
+            num = self.rng.random()
             if num < self.virus.repro_rate:
                 random_person.infection = self.virus
                 self.newly_infected.append(random_person._id)
                 self.total_infected.insert(person._id, random_person._id)
+                self.neither_num -= 1
+                self.infected_num += 1
 
     def run_and_collect(self, experiment):
         """This method should run the simulation until all requirements for
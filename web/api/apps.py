@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        '''Keep the cached payloads in step with the Experiments.'''
+        from . import signals
+        post_migrate.connect(signals.clear_payloads, sender=self)
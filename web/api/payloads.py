@@ -0,0 +1,21 @@
+from django.core.cache import caches
+
+# names of the JSON payloads kept in the 'api' cache for each Experiment,
+# one for each view using CachedPayloadMixin
+TIME_STEP = 'time-step'
+INFECTED_NODE = 'infected-node'
+PAYLOAD_NAMES = (TIME_STEP, INFECTED_NODE)
+
+
+def payload_key(cache_name, pk):
+    """Return the key of an Experiment's payload in the 'api' cache."""
+    return f'{cache_name}:{pk}'
+
+
+def evict_payloads(pk):
+    """Remove every cached payload of an Experiment, so the next request
+       builds it again from the database.
+
+    """
+    caches['api'].delete_many([payload_key(name, pk)
+                               for name in PAYLOAD_NAMES])
@@ -3,7 +3,8 @@ from rest_framework.serializers import ModelSerializer
 from simulator.models import (
     Experiment,
     TimeStep,
-    InfectedNode
+    InfectedNode,
+    EnsembleSummary
 )
 
 
@@ -23,3 +24,9 @@ class InfectedNodeSerializer(ModelSerializer):
     class Meta:
         model = InfectedNode
         fields = '__all__'
+
+
+class EnsembleSummarySerializer(ModelSerializer):
+    class Meta:
+        model = EnsembleSummary
+        fields = '__all__'
@@ -0,0 +1,23 @@
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from simulator.models import Experiment
+from .payloads import evict_payloads
+
+
+@receiver(post_save, sender=Experiment)
+@receiver(post_delete, sender=Experiment)
+def evict_experiment_payloads(sender, instance, **kwargs):
+    """Forget the cached payloads of an Experiment which changed, like one
+       being run again, or one deleted whose id may be given out again.
+
+    """
+    evict_payloads(instance.pk)
+
+
+def clear_payloads(sender, **kwargs):
+    """Forget every cached payload once the database is migrated, as the
+       ids of Experiments restart when the database is flushed or made anew.
+
+    """
+    caches['api'].clear()
@@ -1,12 +1,23 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from rest_framework.test import (
     APIRequestFactory, APITestCase
 )
 from rest_framework import status
+from django.core.cache import cache, caches
+import json
 from django.urls import reverse
 from simulator.models import Experiment, TimeStep
 from api.serializers import ExperimentSerializer, TimeStepSerializer
-from api.views import TimeStepData
+from api.views import (
+    accepts_encoding,
+    ExperimentStatus,
+    TimeStepData,
+    TimeStepChart,
+    InfectedNodeData,
+    EnsembleData
+)
+from api.payloads import INFECTED_NODE, payload_key
+from data_structures.mwaytree import MWayTree
 
 
 class TimeStepDataTests(APITestCase):
@@ -34,6 +45,7 @@ class TimeStepDataTests(APITestCase):
         )
         ordered_time_steps = unordered_time_steps.order_by('step_id')
         self.time_step = ordered_time_steps.last()
+        caches['api'].clear()
 
     def test_retrieve_time_step_data(self):
         '''The data returned about the TimeStep is accurate.'''
@@ -42,3 +54,322 @@ class TimeStepDataTests(APITestCase):
         response = TimeStepData.as_view()(request, self.time_step.id)
         # the response is able to be shown - carries a Http 200 status
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class InfectedNodeDataTests(APITestCase):
+    """
+    This endpoint returns the population tree of infected persons related to
+    an Experiment.
+    """
+    def setUp(self):
+        '''Instaniate RequestFactory and Experiment objects to use in tests.'''
+        self.factory = APIRequestFactory()
+        self.experiment = Experiment.objects.create(title='Ebola Outbreak',
+                                                    population_size=1000,
+                                                    vaccination_percent=0.98,
+                                                    virus_name='Ebola',
+                                                    mortality_chance=0.98,
+                                                    reproductive_rate=0.09,
+                                                    initial_infected=12)
+        # store a small population tree for the Experiment
+        tree = MWayTree(virus_name='Ebola', ids=[1, 2])
+        tree.insert(1, 3)
+        tree.insert(3, 4)
+        self.experiment.store_infected_persons(tree)
+        caches['api'].clear()
+
+    def test_retrieve_infected_node_data(self):
+        '''Without a stored document, the nested tree is built from a
+           constant number of queries.'''
+        url = reverse('api:in_data', args=[self.experiment.id])
+        request = self.factory.get(url)
+        with self.assertNumQueries(3):
+            response = InfectedNodeData.as_view()(request, self.experiment.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # clients without gzip get the document streamed as it is inflated
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(response.getvalue()), {
+            'name': 'Ebola',
+            'children': [
+                {'name': '1', 'children': [
+                    {'name': '3', 'children': [{'name': '4'}]}
+                ]},
+                {'name': '2'}
+            ]
+        })
+
+    def test_cached_infected_node_data(self):
+        '''Once the Experiment is done, repeat views are served from the
+           cache, and revalidated with the ETag.'''
+        url = reverse('api:in_data', args=[self.experiment.id])
+        view = InfectedNodeData.as_view()
+        # unfinished experiments are never cached
+        response = view(self.factory.get(url), self.experiment.id)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertNotIn('ETag', response)
+        self.experiment.status = Experiment.DONE
+        self.experiment.save()
+        response = view(self.factory.get(url), self.experiment.id)
+        etag = response['ETag']
+        self.assertIn('max-age', response['Cache-Control'])
+        with self.assertNumQueries(0):
+            cached = view(self.factory.get(url), self.experiment.id)
+        self.assertEqual(cached.getvalue(), response.getvalue())
+        self.assertEqual(cached['ETag'], etag)
+        # a browser holding the same version gets an empty 304 response
+        request = self.factory.get(url, HTTP_IF_NONE_MATCH=etag)
+        with self.assertNumQueries(0):
+            response = view(request, self.experiment.id)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_changed_experiment_evicts_payloads(self):
+        '''Payloads are dropped from the cache when their Experiment is
+           saved again, or deleted.'''
+        url = reverse('api:in_data', args=[self.experiment.id])
+        view = InfectedNodeData.as_view()
+        self.experiment.status = Experiment.DONE
+        self.experiment.save()
+        view(self.factory.get(url), self.experiment.id)
+        key = payload_key(INFECTED_NODE, self.experiment.id)
+        self.assertIsNotNone(caches['api'].get(key))
+        # running the experiment again starts by saving it
+        self.experiment.status = Experiment.RUNNING
+        self.experiment.save()
+        self.assertIsNone(caches['api'].get(key))
+        self.experiment.status = Experiment.DONE
+        self.experiment.save()
+        view(self.factory.get(url), self.experiment.id)
+        self.assertIsNotNone(caches['api'].get(key))
+        # a deleted experiment's id may be given to a new one
+        self.experiment.delete()
+        self.assertIsNone(caches['api'].get(key))
+
+    def test_retrieve_stored_tree_document(self):
+        '''Finished experiments serve the document stored by the run, gzipped
+           for clients which accept it.'''
+        experiment = Experiment.objects.create(title='Ebola Outbreak',
+                                               population_size=1000,
+                                               vaccination_percent=0.98,
+                                               virus_name='Ebola',
+                                               mortality_chance=0.98,
+                                               reproductive_rate=0.09,
+                                               initial_infected=12)
+        experiment.run_experiment()
+        url = reverse('api:in_data', args=[experiment.id])
+        view = InfectedNodeData.as_view()
+        request = self.factory.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        response = view(request, experiment.id)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response.content,
+                         bytes(experiment.population_tree.document))
+        # other clients get the same document, decompressed, including
+        # those which refuse gzip outright
+        request = self.factory.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        response = view(request, experiment.id)
+        self.assertNotIn('Content-Encoding', response)
+        response = view(self.factory.get(url), experiment.id)
+        self.assertNotIn('Content-Encoding', response)
+        document = json.loads(response.getvalue())
+        self.assertEqual(document['name'], 'Ebola')
+        self.assertEqual(len(document['children']), 12)
+
+    def test_retrieve_slice_of_tree(self):
+        '''A bounded slice of the tree takes one query per level, and counts
+           the children left out.'''
+        url = reverse('api:in_data', args=[self.experiment.id])
+        view = InfectedNodeData.as_view()
+        request = self.factory.get(url, {'depth': 1})
+        with self.assertNumQueries(2):
+            response = view(request, self.experiment.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'name': 'Ebola',
+            'children': [{'name': '1', 'child_count': 1}, {'name': '2'}]
+        })
+        # branches load from any node, and children are paged
+        request = self.factory.get(url, {'root': '1', 'depth': 5})
+        response = view(request, self.experiment.id)
+        self.assertEqual(response.data, {
+            'name': '1',
+            'children': [{'name': '3', 'children': [{'name': '4'}]}]
+        })
+        request = self.factory.get(url, {'offset': 1, 'limit': 1})
+        response = view(request, self.experiment.id)
+        self.assertEqual(response.data, {
+            'name': 'Ebola',
+            'children': [{'name': '2'}],
+            'child_count': 2
+        })
+
+    @override_settings(API_TREE_MAX_NODES=50)
+    def test_slice_of_wide_tree_is_bounded(self):
+        '''However deep and wide a slice is asked for, it holds at most
+           API_TREE_MAX_NODES nodes, and counts the children of the rest.'''
+        tree = MWayTree(virus_name='Ebola', ids=range(20))
+        for parent in range(20):
+            for child in range(20):
+                tree.insert(parent, 100 + 20 * parent + child)
+        experiment = Experiment.objects.create(title='Wide Tree',
+                                               population_size=1000,
+                                               vaccination_percent=0.5,
+                                               virus_name='Ebola',
+                                               mortality_chance=0.5,
+                                               reproductive_rate=0.5,
+                                               initial_infected=20)
+        experiment.store_infected_persons(tree)
+        url = reverse('api:in_data', args=[experiment.id])
+        request = self.factory.get(url, {'depth': 10, 'limit': 1000})
+        response = InfectedNodeData.as_view()(request, experiment.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sent = list()
+        nodes = [response.data]
+        while len(nodes) > 0:
+            node = nodes.pop()
+            sent.append(node)
+            nodes.extend(node.get('children', []))
+        self.assertEqual(len(sent), 50)
+        # every node cut off from its children says how many there are
+        for node in sent:
+            name = node['name']
+            count = 20 if name == 'Ebola' or int(name) < 20 else 0
+            if len(node.get('children', [])) < count:
+                self.assertEqual(node['child_count'], count)
+            else:
+                self.assertNotIn('child_count', node)
+
+    def test_retrieve_slice_with_bad_parameters(self):
+        '''Slices of unknown roots are not found, and bad sizes are refused.'''
+        url = reverse('api:in_data', args=[self.experiment.id])
+        view = InfectedNodeData.as_view()
+        response = view(self.factory.get(url, {'root': '9'}),
+                        self.experiment.id)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        for params in ({'depth': 'two'}, {'depth': -1}, {'limit': 0}):
+            response = view(self.factory.get(url, params), self.experiment.id)
+            self.assertEqual(response.status_code,
+                             status.HTTP_400_BAD_REQUEST)
+
+    def test_iter_document_of_long_chain(self):
+        '''Chains longer than the recursion limit are still nested.'''
+        children_of = {id: [(id + 1, str(id + 1))] for id in range(4999)}
+        children_of[-1] = [(0, '0')]
+        chunks = InfectedNodeData().iter_document((-1, 'Ebola'), children_of)
+        document = ''.join(chunks)
+        self.assertTrue(document.startswith(
+            '{"name": "Ebola", "children": [{"name": "0", "children": ['))
+        self.assertTrue(document.endswith('{"name": "4999"}' + ']}' * 5000))
+
+
+class AcceptsEncodingTests(TestCase):
+    """
+    Responses are only compressed for clients which accept the encoding.
+    """
+    def test_accepts_encoding(self):
+        '''Codings are accepted unless left out or given a q-value of 0.'''
+        for header in ('gzip', 'deflate, GZIP;q=0.5', 'br, *', 'x-gzip'):
+            self.assertTrue(accepts_encoding(header)('gzip'), header)
+        for header in ('', 'br', 'gzip;q=0', 'gzip;q=0.0, *', '*;q=0'):
+            self.assertFalse(accepts_encoding(header)('gzip'), header)
+
+
+class ExperimentStatusTests(APITestCase):
+    """
+    This endpoint returns the status of the job running an Experiment.
+    """
+    def setUp(self):
+        '''Instaniate RequestFactory and Experiment objects to use in tests.'''
+        self.factory = APIRequestFactory()
+        self.experiment = Experiment.objects.create(title='Ebola Outbreak',
+                                                    population_size=1000,
+                                                    vaccination_percent=0.98,
+                                                    virus_name='Ebola',
+                                                    mortality_chance=0.98,
+                                                    reproductive_rate=0.09,
+                                                    initial_infected=12)
+
+    def test_retrieve_status(self):
+        '''The status follows the Experiment from the queue to the end.'''
+        url = reverse('api:status', args=[self.experiment.id])
+        request = self.factory.get(url)
+        response = ExperimentStatus.as_view()(request, self.experiment.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'status': Experiment.QUEUED})
+        # once the experiment runs, the status says so
+        self.experiment.run_experiment()
+        response = ExperimentStatus.as_view()(request, self.experiment.id)
+        self.assertEqual(response.data, {'status': Experiment.DONE})
+
+
+class EnsembleDataTests(APITestCase):
+    """
+    This endpoint returns the latest summary of the replicates of an
+    Experiment.
+    """
+    def setUp(self):
+        '''Instaniate RequestFactory and Experiment objects to use in tests.'''
+        self.factory = APIRequestFactory()
+        self.experiment = Experiment.objects.create(title='Ebola Outbreak',
+                                                    population_size=1000,
+                                                    vaccination_percent=0.98,
+                                                    virus_name='Ebola',
+                                                    mortality_chance=0.98,
+                                                    reproductive_rate=0.09,
+                                                    initial_infected=12)
+        caches['api'].clear()
+
+    def test_retrieve_ensemble_data(self):
+        '''The summary is only found after the replicates have run.'''
+        url = reverse('api:ensemble_data', args=[self.experiment.id])
+        request = self.factory.get(url)
+        response = EnsembleData.as_view()(request, self.experiment.id)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.experiment.run_ensemble(4, seed=1, max_workers=2)
+        response = EnsembleData.as_view()(request, self.experiment.id)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['replicates'], 4)
+        first_step = response.data['steps'][0]
+        self.assertEqual(first_step['step_id'], 1)
+        self.assertIn('q95', first_step['dead'])
+
+
+class TimeStepChartTests(APITestCase):
+    """
+    This endpoint returns the bar graph of a TimeStep as an image.
+    """
+    def setUp(self):
+        '''Instaniate RequestFactory and Experiment objects to use in tests.'''
+        self.factory = APIRequestFactory()
+        self.experiment = Experiment.objects.create(title='Ebola Outbreak',
+                                                    population_size=1000,
+                                                    vaccination_percent=0.98,
+                                                    virus_name='Ebola',
+                                                    mortality_chance=0.98,
+                                                    reproductive_rate=0.09,
+                                                    initial_infected=12)
+        self.experiment.run_experiment()
+        cache.clear()
+        caches['api'].clear()
+
+    def test_retrieve_time_step_chart(self):
+        '''The chart is rendered once, then served from the cache.'''
+        url = reverse('api:ts_chart', args=[self.experiment.id, 1, 'png'])
+        request = self.factory.get(url)
+        view = TimeStepChart.as_view()
+        response = view(request, self.experiment.id, 1, 'png')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+        # repeat views don't touch the database, or render again
+        with self.assertNumQueries(0):
+            cached = view(request, self.experiment.id, 1, 'png')
+        self.assertEqual(cached.content, response.content)
+
+    def test_missing_time_step_chart(self):
+        '''Steps that don't exist, and unknown formats, are not found.'''
+        request = self.factory.get('/')
+        view = TimeStepChart.as_view()
+        response = view(request, self.experiment.id, 10000, 'png')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = view(request, self.experiment.id, 1, 'gif')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
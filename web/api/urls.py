@@ -1,10 +1,23 @@
 from django.urls import path
-from .views import TimeStepData, InfectedNodeData
+from .views import (
+    ExperimentStatus,
+    TimeStepData,
+    TimeStepChart,
+    InfectedNodeData,
+    EnsembleData
+)
 
 app_name = 'api'
 urlpatterns = [
     # used to send data to use for AJAX calls, then make graphs with Chart.js
     path('<int:pk>/charts/time-step/', TimeStepData.as_view(), name="ts_data"),
+    # images of the bar graph of each step, rendered on the server
+    path('<int:pk>/charts/time-step/<int:step>.<str:image_format>',
+         TimeStepChart.as_view(), name="ts_chart"),
     path('<int:pk>/chart/infected-node/', InfectedNodeData.as_view(),
          name="in_data"),
+    path('<int:pk>/charts/ensemble/', EnsembleData.as_view(),
+         name="ensemble_data"),
+    # polled by the results page while the experiment runs in the background
+    path('<int:pk>/status/', ExperimentStatus.as_view(), name="status"),
 ]
@@ -1,13 +1,193 @@
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.http import HttpResponseRedirect, JsonResponse
-from .serializers import TimeStepSerializer, InfectedNodeSerializer
-from simulator.models import Experiment, TimeStep, InfectedNode
+from rest_framework import status
+from django.http import (
+    HttpResponse,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse
+)
+from django.core.cache import cache, caches
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from django.conf import settings
+from .serializers import (
+    ExperimentSerializer,
+    TimeStepSerializer,
+    InfectedNodeSerializer,
+    EnsembleSummarySerializer
+)
+from simulator.models import (
+    Experiment,
+    TimeStep,
+    InfectedNode,
+    PopulationTree,
+    EnsembleSummary
+)
 from pprint import pprint
+from collections import defaultdict
+import hashlib
+import json
+from analysis import charts
+from . import payloads
+from data_structures.tree_json import gzip_chunks, iter_gunzip, iter_tree_json
 
 
-class TimeStepData(APIView):
+def accepts_encoding(header):
+    """Return a function telling if a client accepts a content coding.
+
+       The Accept-Encoding header lists codings with optional q-values, and
+       a coding with a q-value of 0 is refused, as is one left out when there
+       is no "*".
+
+       Parameters:
+       header(str): the Accept-Encoding header of the request
+
+       Returns:
+       function: takes the name of a coding, and returns True if accepted
+
+    """
+    qualities = dict()
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if coding == '':
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+
+    def accepts(coding):
+        '''Return True if the client accepts the named coding.'''
+        coding = coding.lower()
+        # x-gzip is an old name of gzip, which clients may still send
+        aliases = {'gzip': 'x-gzip'}
+        for name in (coding, aliases.get(coding)):
+            if name in qualities:
+                return qualities[name] > 0
+        return qualities.get('*', 0) > 0
+    return accepts
+
+
+class ExperimentStatus(APIView):
+    """
+    View to report the progress of the background job running an Experiment.
+    """
+    serializer_class = ExperimentSerializer
+    authentication_classes = list()
+    permission_classes = list()
+
+    def get(self, request, pk, format=None):
+        """Return the status of the job running an Experiment.
+
+           request(HttpRequest): the GET request sent to the server
+           pk(int): unique id value of an Experiment instance
+           format(str): the suffix applied to the endpoint to indicate how the
+                        data is structured (i.e. html, json)
+
+           Returns:
+           Response: one of 'queued', 'running', 'done' or 'failed'
+
+        """
+        experiment = Experiment.objects.only('status').get(id=pk)
+        return Response({'status': experiment.status})
+
+
+class CachedPayloadMixin:
+    """
+    Serves the JSON payload of a view from the 'api' cache, once its
+    Experiment is done and the payload can no longer change.
+
+    Views using this define cache_name, and build_body(pk), which returns
+    the body of the response as JSON bytes, with the name of the encoding
+    they are compressed with (or None), or returns None if there is no
+    payload.
+    """
+    cache_name = None
+
+    def cached_response(self, request, pk):
+        """Return the payload for an Experiment, from the cache if it is there.
+
+           Payloads of finished Experiments are cached with a strong ETag, so
+           the browser can revalidate its copy and get a 304 Not Modified.
+           Payloads of unfinished Experiments are built on every request.
+           Compressed bodies are sent as they are to clients accepting their
+           encoding, and streamed to the rest as they are decompressed, so
+           the whole payload is never held in memory uncompressed.
+
+           request(HttpRequest): the GET request sent to the server
+           pk(int): unique id value of an Experiment instance
+
+           Returns:
+           HttpResponse: the payload as JSON, or an empty 304 or 404 response
+
+        """
+        api_cache = caches['api']
+        key = payloads.payload_key(self.cache_name, pk)
+        accepted = accepts_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        cached = api_cache.get(key)
+        if cached is None:
+            experiment_status = Experiment.objects.filter(
+                id=pk
+            ).values_list('status', flat=True).first()
+            built = self.build_body(pk)
+            if built is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            body, encoding = built
+            if experiment_status != Experiment.DONE:
+                response = self.body_response(body, encoding, accepted)
+                patch_cache_control(response, no_cache=True)
+                patch_vary_headers(response, ['Accept-Encoding'])
+                return response
+            cached = (hashlib.sha256(body).hexdigest(), body, encoding)
+            api_cache.set(key, cached)
+        digest, body, encoding = cached
+        if encoding is not None and not accepted(encoding):
+            # each representation of the payload needs its own strong ETag
+            digest += '-identity'
+        etag = quote_etag(digest)
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = self.body_response(body, encoding, accepted)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True,
+                            max_age=settings.API_CACHE_MAX_AGE)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    def body_response(self, body, encoding, accepted):
+        """Return a response with the body, decompressing it as it is sent if
+           the client does not accept its encoding.
+
+           body(bytes): the JSON payload, possibly compressed
+           encoding(str): the encoding of the body, or None
+           accepted(function): tells if the client accepts an encoding
+
+           Returns:
+           HttpResponse: the body, or a StreamingHttpResponse of the body
+                         decompressed
+
+        """
+        if encoding is None:
+            return HttpResponse(body, content_type='application/json')
+        if accepted(encoding):
+            response = HttpResponse(body, content_type='application/json')
+            response['Content-Encoding'] = encoding
+            return response
+        return StreamingHttpResponse(iter_gunzip(body),
+                                     content_type='application/json')
+
+
+class TimeStepData(CachedPayloadMixin, APIView):
     """
     View to list the fields and values of all time steps related to an
     Experiment.
@@ -15,6 +195,7 @@ class TimeStepData(APIView):
     serializer_class = TimeStepSerializer
     authentication_classes = list()
     permission_classes = list()
+    cache_name = payloads.TIME_STEP
 
     def get(self, request, pk, format=None):
         """Return a list of all time steps with fields and values.
@@ -25,13 +206,22 @@ class TimeStepData(APIView):
                         data is structured (i.e. html, json)
 
            Returns:
-           Response: the data used to make bar charts on the front end
+           HttpResponse: the data used to make bar charts on the front end
+
+        """
+        return self.cached_response(request, pk)
+
+    def build_body(self, pk):
+        """Return the sizes of the populations in the last TimeStep, as
+           JSON.
 
         """
         # get all Time Steps related to the Experiment, return the last
         time_step = (
             TimeStep.objects.filter(experiment__id=pk).order_by('pk').last()
         )
+        if time_step is None:
+            return None
         population_size = time_step.alive + time_step.dead
         data = {
                 "labels": [
@@ -47,10 +237,96 @@ class TimeStepData(APIView):
                     time_step.uninteracted
                 ]
         }
-        return Response(data)
+        return json.dumps(data).encode(), None
 
 
-class InfectedNodeData(APIView):
+class TimeStepChart(APIView):
+    """
+    View to show the bar graph of one TimeStep of an Experiment, as an image.
+    """
+    serializer_class = TimeStepSerializer
+    authentication_classes = list()
+    permission_classes = list()
+    # one Figure, reused to draw every chart this process renders
+    renderer = charts.ChartRenderer()
+
+    def get(self, request, pk, step, image_format, format=None):
+        """Return the bar graph of a TimeStep, rendering it only if it is not
+           already in the cache.
+
+           The cache maps each experiment and step to the address of the
+           chart's content, and each address to the image itself, so charts
+           with the same numbers are only rendered and stored once.
+
+           request(HttpRequest): the GET request sent to the server
+           pk(int): unique id value of an Experiment instance
+           step(int): the step_id of the TimeStep
+           image_format(str): one of 'png' or 'svg'
+
+           Returns:
+           HttpResponse: the image of the bar graph
+
+        """
+        if image_format not in charts.FORMATS:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        content_type = charts.FORMATS[image_format]
+        step_key = f'chart:{pk}:{step}:{image_format}'
+        address = cache.get(step_key)
+        image = None if address is None else cache.get(f'chart:{address}')
+        if image is None:
+            time_step = TimeStep.objects.filter(
+                experiment__id=pk, step_id=step
+            ).first()
+            if time_step is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            chart = charts.BarGraph(
+                charts.POPULATIONS,
+                [time_step.total_vaccinated, time_step.current_infected,
+                 time_step.dead, time_step.uninteracted],
+                charts.x_label(step),
+                charts.Y_LABEL,
+                charts.TITLE,
+            )
+            address = charts.chart_key(image_format, *chart)
+            image = cache.get(f'chart:{address}')
+            if image is None:
+                image = self.renderer.render(*chart, image_format)
+                # the content of an address never changes, so never expire it
+                cache.set(f'chart:{address}', image, None)
+            cache.set(step_key, address, None)
+        return HttpResponse(image, content_type=content_type)
+
+
+class EnsembleData(APIView):
+    """
+    View to show the latest summary of the replicates of an Experiment.
+    """
+    serializer_class = EnsembleSummarySerializer
+    authentication_classes = list()
+    permission_classes = list()
+
+    def get(self, request, pk, format=None):
+        """Return the mean, confidence interval and quantiles of each
+           TimeStep field, at every step of the replicates.
+
+           request(HttpRequest): the GET request sent to the server
+           pk(int): unique id value of an Experiment instance
+           format(str): the suffix applied to the endpoint to indicate how the
+                        data is structured (i.e. html, json)
+
+           Returns:
+           Response: the data used to chart the spread of the results
+
+        """
+        summary = EnsembleSummary.objects.filter(
+            experiment__id=pk
+        ).order_by('created').last()
+        if summary is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(self.serializer_class(summary).data)
+
+
+class InfectedNodeData(CachedPayloadMixin, APIView):
     """
     View to list the fields and values of all time steps related to an
     Experiment.
@@ -58,67 +334,164 @@ class InfectedNodeData(APIView):
     serializer_class = InfectedNodeSerializer
     authentication_classes = list()
     permission_classes = list()
+    cache_name = payloads.INFECTED_NODE
 
-    def define_data(self, node, parent=None):
-        """Organize nodes in a top-down structure, starting from the virus
-           node.
+    def iter_document(self, node, children_of):
+        """Yield the population tree as JSON, starting from the virus node.
 
            Parameters:
-           infected_nodes(QuerySet):
-                    each has attributes of the InfectedNode model, as well as
-                    a 'children' attribute, which is a list of all the
-                    InfectedNode instances representing those whom they
-                    infected.
-
-           node(InfectedNode): represents the node who infects other
-                                persons. Occupies the root of the
-                                whole nested structure, initially.
+           node(tuple): the id and identifier of the virus node, which
+                        occupies the root of the whole nested structure.
 
-           parent(InfectedNode): represents the InfectedNode who infected the
-                                 argument passed into the node param.
+           children_of(dict): maps the id of each InfectedNode to a list of
+                              the ids and identifiers of those whom they
+                              infected.
 
 
-           Return: dict - nested dictionary of virus node.
-                   Contains fields for its id value, and its children, then
-                   their children, and so on.
-                   Recursively structured.
+           Return: generator - str chunks of the nested document of the virus
+                   node. Contains fields for its identifier, and its
+                   children, then their children, and so on.
+                   Written iteratively, holding only the path down to the
+                   current node, so chains of any length fit.
 
         """
-        data = {'name': node.identifier}
-        # begin traversal of other nodes
-        if hasattr(node, 'children'):
-            children_data = list()
-            for child_node_id in node.children:
-                # get the actual InfectedNode instance
-                child_node = InfectedNode.objects.get(identifier=child_node_id,
-                                                      parent=node)
-                child_data = self.define_data(child_node, node)
-                children_data.append(child_data)
-            # Only add to dict if has children
-            if len(children_data) > 0:
-                data['children'] = children_data
-        return data
+        return iter_tree_json(node, lambda node: children_of.get(node[0], ()),
+                              lambda node: node[1])
+
+    # query parameters which ask for a slice of the tree, not the whole
+    SLICE_PARAMS = ('root', 'depth', 'offset', 'limit')
 
     def get(self, request, pk, format=None):
         """Return a recursively list of all instances of InfectedNode that
            are related to a certain Experiment.
 
+           The query parameters root, depth, offset and limit ask for a slice
+           of the tree instead, for front ends which load branches lazily.
+
            request(HttpRequest): the GET request sent to the server
            pk(int): unique id value of an Experiment instance
            format(str): the suffix applied to the endpoint to indicate how the
                         data is structured (i.e. html, json)
 
            Returns:
-           Response: the data used to make a population tree on the front end
+           HttpResponse: the data used to make a population tree on the front
+                         end
 
         """
-        # get all InfectedNodes related to the Experiment
-        experiment = Experiment.objects.get(id=pk)
-        # start with the InfectedNode that holds the virus
-        infected_nodes = InfectedNode.objects.filter(experiment=experiment)
-        virus = infected_nodes.get(identifier=experiment.virus_name)
-        # turn query set into python list of InfectedNode objects
-        infected_nodes = list(infected_nodes)
-        # return data on InfectedNodes in a top-down structure
-        data = self.define_data(virus)
+        params = request.query_params
+        if not any(name in params for name in self.SLICE_PARAMS):
+            return self.cached_response(request, pk)
+        try:
+            depth = int(params.get('depth', 1))
+            offset = int(params.get('offset', 0))
+            limit = int(params.get('limit', settings.API_TREE_PAGE_SIZE))
+        except ValueError:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        if depth < 0 or offset < 0 or limit < 1:
+            return Response(status=status.HTTP_400_BAD_REQUEST)
+        data = self.build_slice(pk, params.get('root'),
+                                min(depth, settings.API_TREE_MAX_DEPTH),
+                                offset,
+                                min(limit, settings.API_TREE_MAX_PAGE_SIZE))
+        if data is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
         return Response(data)
+
+    def build_slice(self, pk, root, depth, offset, limit):
+        """Return a bounded slice of the population tree, nested the same
+           way as the whole tree.
+
+           Nodes which have children not in the slice get a "child_count" of
+           all their children, so the front end knows there is more to load.
+           The slice takes one query per level, and holds no more than
+           API_TREE_MAX_NODES nodes: once they are listed, the levels below
+           are left to load later.
+
+           Parameters:
+           pk(int): unique id value of an Experiment instance
+           root(str): identifier of the node at the top of the slice, or None
+                      for the virus node
+           depth(int): number of levels to include below the root
+           offset(int): number of the root's children to skip
+           limit(int): most children listed under each node
+
+           Returns:
+           dict: the nested slice, or None if there is no such root
+
+        """
+        nodes = InfectedNode.objects.filter(
+            experiment__id=pk
+        ).only('identifier', 'children')
+        if root is None:
+            root_node = nodes.filter(parent__isnull=True).first()
+        else:
+            root_node = nodes.filter(identifier=root).first()
+        if root_node is None:
+            return None
+        data = {'name': root_node.identifier}
+        # number of nodes which may still be added below the root
+        budget = settings.API_TREE_MAX_NODES - 1
+        # nodes on the current level, with their dicts and children to list
+        level = [(root_node, data, offset)]
+        for _ in range(depth):
+            listed = list()
+            for node, node_data, start in level:
+                children = node.children or []
+                page = children[start:start + min(limit, budget)]
+                budget -= len(page)
+                listed.append((node, node_data, page))
+            identifiers = [child for _, _, children in listed
+                           for child in children]
+            if len(identifiers) == 0:
+                # nothing more to list, so the level is the deepest one
+                break
+            # identifiers are unique within an Experiment
+            child_nodes = {
+                child_node.identifier: child_node
+                for child_node in nodes.filter(identifier__in=identifiers)
+            }
+            level = list()
+            for node, node_data, children in listed:
+                if len(children) > 0:
+                    node_data['children'] = list()
+                for child in children:
+                    child_data = {'name': child}
+                    node_data['children'].append(child_data)
+                    level.append((child_nodes[child], child_data, 0))
+                if len(children) < len(node.children or []):
+                    node_data['child_count'] = len(node.children)
+        # the children of the deepest level are left to load later
+        for node, node_data, _ in level:
+            if len(node.children or []) > 0:
+                node_data['child_count'] = len(node.children)
+        return data
+
+    def build_body(self, pk):
+        """Return the gzipped document of the population tree stored when
+           the Experiment finished, or write it from its InfectedNodes, or
+           return None if the tree hasn't been saved.
+
+        """
+        document = PopulationTree.objects.filter(
+            experiment__id=pk
+        ).values_list('document', flat=True).first()
+        if document is not None:
+            return bytes(document), 'gzip'
+        # experiments run before the documents were stored: get all their
+        # InfectedNodes in one query, as tuples rather than model instances
+        infected_nodes = InfectedNode.objects.filter(
+            experiment__id=pk
+        ).values_list('id', 'identifier', 'parent_id').order_by('pk')
+        # map each node to those they infected, and find the virus node
+        virus = None
+        children_of = defaultdict(list)
+        for id, identifier, parent_id in infected_nodes.iterator():
+            if parent_id is None:
+                virus = (id, identifier)
+            else:
+                children_of[parent_id].append((id, identifier))
+        # the tree is only saved once the experiment is done
+        if virus is None:
+            return None
+        # compress the document as it is written, instead of nesting dicts
+        return gzip_chunks(self.iter_document(virus, children_of)), 'gzip'
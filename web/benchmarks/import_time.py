@@ -0,0 +1,66 @@
+import argparse
+import statistics
+import os
+import subprocess
+import sys
+
+# Measures how long it takes a fresh Python process to import the modules the
+# web app and the workers boot with, and which heavy libraries each one pulls
+# in. Run it from the web/ directory, before and after a change:
+#
+#     python benchmarks/import_time.py --repeat 10
+
+WEB_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# code timed in each fresh process, after the interpreter has started
+TARGETS = {
+    'analysis.visualizer': 'import analysis.visualizer',
+    'analysis.web_simulation': 'import analysis.web_simulation',
+    'django boot': (
+        "import os, django\n"
+        "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'web.settings')\n"
+        "django.setup()\n"
+        "import simulator.models, api.urls"
+    ),
+}
+# libraries that only drawing charts or uploading files should need
+HEAVY = ['matplotlib', 'pylab', 'boto3']
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ','.join(heavy))
+'''
+
+
+def time_import(code):
+    """Return the seconds a fresh process took to run the code, and the
+       heavy libraries it imported.
+
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', SCRIPT.format(code=code, heavy=HEAVY)],
+        cwd=WEB_DIR, check=True, capture_output=True, text=True
+    ).stdout.split()
+    heavy = output[1].split(',') if len(output) > 1 else list()
+    return float(output[0]), heavy
+
+
+def main(repeat):
+    """Print the median import time of each target, over some runs."""
+    print(f"{'target':<26}{'median (s)':>12}{'min (s)':>10}  heavy imports")
+    for name, code in TARGETS.items():
+        times = list()
+        for _ in range(repeat):
+            seconds, heavy = time_import(code)
+            times.append(seconds)
+        print(f"{name:<26}{statistics.median(times):>12.3f}"
+              f"{min(times):>10.3f}  {', '.join(heavy) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Time cold imports of the modules the app boots with.')
+    parser.add_argument('--repeat', type=int, default=5)
+    main(parser.parse_args().repeat)
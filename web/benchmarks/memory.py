@@ -0,0 +1,67 @@
+import argparse
+import random
+import tracemalloc
+from analysis.person import Person
+from analysis.simulation import Simulation
+from analysis.virus import Virus
+from data_structures.mwaytree import MWayTree
+
+# Measures the memory taken by the objects a simulation is made of, per person
+# and per infected node. Run it as a module from the web/ directory, so the
+# analysis package can be imported, before and after a change:
+#
+#     python -m benchmarks.memory --size 1000000
+
+
+def measure(build):
+    """Return the bytes still allocated by the result of build, and the
+       result itself.
+
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def build_people(size):
+    """Return a list of Persons, one in ten of them infected."""
+    virus = Virus('Ebola', 0.25, 0.7)
+    return [Person(i, False, virus if i % 10 == 0 else None)
+            for i in range(size)]
+
+
+def build_tree(size):
+    """Return an MWayTree where each person was infected by an earlier one."""
+    tree = MWayTree('Ebola')
+    rng = random.Random(0)
+    tree.insert('Ebola', 0)
+    for child in range(1, size):
+        tree.insert(rng.randrange(child), child)
+    return tree
+
+
+def build_simulation(size):
+    """Return a Simulation, with its population and index of living people."""
+    virus = Virus('Ebola', 0.25, 0.7)
+    return Simulation(size, 0.5, virus, 10, seed=0, log_dir=None)
+
+
+def main(size):
+    """Print the memory used per person by each kind of object."""
+    print(f"{'objects':<14}{'total (MB)':>12}{'per person (bytes)':>20}")
+    for name, build in [('Person', build_people),
+                        ('MWayTreeNode', build_tree),
+                        ('Simulation', build_simulation)]:
+        used, result = measure(lambda: build(size))
+        print(f"{name:<14}{used / 1e6:>12.1f}{used / size:>20.1f}")
+        del result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Measure the memory used per simulated person.')
+    parser.add_argument('--size', type=int, default=1000000)
+    main(parser.parse_args().size)
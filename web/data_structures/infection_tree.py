@@ -0,0 +1,206 @@
+#!python3
+import numpy as np
+
+
+class InfectionTree:
+    """InfectionTree: the same tree of infections as an MWayTree, stored in
+       flat arrays indexed by person id instead of a graph of nodes.
+
+       Root represents the virus itself. Every other id is a person in the
+       Experiment, and must be a non-negative integer. For each person the
+       tree stores who infected them (parent), the time step they were
+       infected in (step) and how far they are from the virus (depth). The
+       children of each node are only gathered, in CSR form, when a query
+       needs them.
+
+    """
+    START = 'Virus'
+    # parent of a person infected by the virus, and of a person not in the tree
+    ROOT = -1
+    ABSENT = -2
+
+    def __init__(self, virus_name=None, ids=None, capacity=0):
+        """Initialize this tree, with room for ids below the capacity, and
+           insert the given ids under the root, if any.
+
+        """
+        if virus_name is None:
+            virus_name = InfectionTree.START
+        self.virus_name = virus_name
+        self.parent = np.full(capacity, InfectionTree.ABSENT, dtype=np.int32)
+        self.step = np.zeros(capacity, dtype=np.int32)
+        self.depth = np.zeros(capacity, dtype=np.int32)
+        # ids in the order they were inserted
+        self.order = np.zeros(capacity, dtype=np.int32)
+        # Count the number of ids inserted into the tree
+        self.size = 0
+        # children of each node in CSR form, made by _children_csr
+        self._csr = None
+        if ids is not None:
+            for id in ids:
+                self.insert(virus_name, id)
+
+    def _grow(self, capacity):
+        """Make room in the arrays for ids below the given capacity, at least
+           doubling their length so inserts take amortized O(1) time.
+
+        """
+        old = len(self.parent)
+        if capacity <= old:
+            return
+        new = max(capacity, 2 * old)
+        parent = np.full(new, InfectionTree.ABSENT, dtype=np.int32)
+        parent[:old] = self.parent
+        self.parent = parent
+        for name in ('step', 'depth', 'order'):
+            array = np.zeros(new, dtype=np.int32)
+            array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+    def _is_person(self, id):
+        """Return True if the id could be stored in the arrays."""
+        return isinstance(id, (int, np.integer)) and id >= 0
+
+    def contains(self, id):
+        '''Return True if this tree contains the given id.
+
+           Runtime Complexity:
+           O(1), because the id is an index into the array of parents.
+
+        '''
+        if id == self.virus_name:
+            return True
+        return bool(self._is_person(id) and id < len(self.parent) and
+                    self.parent[id] != InfectionTree.ABSENT)
+
+    def is_empty(self):
+        """Return True if this tree is empty (contains no ids)."""
+        return (self.size == 0)
+
+    def insert(self, parent_id, child_id, step=0):
+        '''Insert a new child into the tree, infected in the given step.'''
+        if self.contains(child_id):
+            return
+        assert self._is_person(child_id)
+        if parent_id == self.virus_name:
+            parent, depth = InfectionTree.ROOT, 1
+        else:
+            assert self.contains(parent_id)
+            parent, depth = parent_id, int(self.depth[parent_id]) + 1
+        if child_id >= len(self.parent) or self.size >= len(self.parent):
+            self._grow(max(child_id, self.size) + 1)
+        self.parent[child_id] = parent
+        self.step[child_id] = step
+        self.depth[child_id] = depth
+        self.order[self.size] = child_id
+        self.size += 1
+        self._csr = None
+
+    def insert_many(self, parent_ids, child_ids, step=0):
+        """Insert many children infected in the same step at once, such as
+           everyone infected during one time step of a simulation.
+
+           Parameters:
+           parent_ids(ndarray): ids of the people who infected each child,
+                                all of them already in the tree
+           child_ids(ndarray): ids of the children, none of them in the tree
+                               and none repeated
+           step(int): the time step the children were infected in
+
+        """
+        parent_ids = np.asarray(parent_ids, dtype=np.int32)
+        child_ids = np.asarray(child_ids, dtype=np.int32)
+        if len(child_ids) == 0:
+            return
+        self._grow(max(int(child_ids.max()), self.size + len(child_ids)) + 1)
+        assert np.all(self.parent[child_ids] == InfectionTree.ABSENT)
+        assert np.all(self.parent[parent_ids] != InfectionTree.ABSENT)
+        self.parent[child_ids] = parent_ids
+        self.step[child_ids] = step
+        self.depth[child_ids] = self.depth[parent_ids] + 1
+        self.order[self.size:self.size + len(child_ids)] = child_ids
+        self.size += len(child_ids)
+        self._csr = None
+
+    def _children_csr(self):
+        """Return the children of every node in CSR form: the children of id
+           are children[offsets[id + 1]:offsets[id + 2]], and those of the
+           root are children[offsets[0]:offsets[1]], in insertion order.
+
+        """
+        if self._csr is None:
+            inserted = self.order[:self.size]
+            # shift parents up by one, so the root's children come first
+            keys = self.parent[inserted].astype(np.int64) + 1
+            children = inserted[np.argsort(keys, kind='stable')]
+            counts = np.bincount(keys, minlength=len(self.parent) + 1)
+            offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            self._csr = (children, offsets)
+        return self._csr
+
+    def children(self, id):
+        """Return an array of the ids the given id infected."""
+        children, offsets = self._children_csr()
+        start = 0 if id == self.virus_name else id + 1
+        return children[offsets[start]:offsets[start + 1]]
+
+    def complete(self, id):
+        """Return a list of all ids that fall under a specific id, in
+           pre-order, starting with the id itself.
+
+        """
+        if not self.contains(id):
+            return []
+        children, offsets = self._children_csr()
+        completions = [id]
+        # stack of ids still to visit, the next one last
+        start = 0 if id == self.virus_name else id + 1
+        stack = children[offsets[start]:offsets[start + 1]][::-1].tolist()
+        while len(stack) > 0:
+            node = stack.pop()
+            completions.append(node)
+            stack.extend(
+                children[offsets[node + 1]:offsets[node + 2]][::-1].tolist())
+        return completions
+
+    def ids(self):
+        """Return a list of all ids stored in this tree, in level order
+           (breadth first), starting with the root.
+
+        """
+        children, offsets = self._children_csr()
+        all_ids = [self.virus_name]
+        level = children[offsets[0]:offsets[1]]
+        while len(level) > 0:
+            all_ids.extend(level.tolist())
+            # gather the children of the whole level at once
+            starts = offsets[level + 1]
+            counts = offsets[level + 2] - starts
+            positions = (np.repeat(starts - np.cumsum(counts) + counts,
+                                   counts) + np.arange(counts.sum()))
+            level = children[positions]
+        return all_ids
+
+    def at_depth(self, depth):
+        """Return an array of the ids at the given depth, where the people the
+           virus infected directly are at depth 1.
+
+        """
+        inserted = self.order[:self.size]
+        return np.sort(inserted[self.depth[inserted] == depth])
+
+    def subtree_sizes(self):
+        """Return an array with the number of people in the subtree under
+           each id, counting the id itself, and 0 for ids not in the tree.
+
+        """
+        sizes = np.zeros(len(self.parent), dtype=np.int64)
+        inserted = self.order[:self.size]
+        sizes[inserted] = 1
+        # add each level into the one above it, from the bottom up
+        depths = self.depth[inserted]
+        for depth in range(int(depths.max(initial=0)), 1, -1):
+            level = inserted[depths == depth]
+            np.add.at(sizes, self.parent[level], sizes[level])
+        return sizes
@@ -0,0 +1,108 @@
+#!python3
+from .infection_tree import InfectionTree
+from .mwaytree import MWayTree
+import numpy as np
+import random
+import unittest
+
+
+class InfectionTreeTest(unittest.TestCase):
+
+    def test_init_and_properties(self):
+        tree = InfectionTree()
+        # Verify tree size property
+        assert tree.size == 0
+        assert tree.is_empty() is True
+        assert tree.virus_name == InfectionTree.START
+        assert tree.ids() == ['Virus']
+
+    def test_insert(self):
+        tree = InfectionTree('Ebola')
+        tree.insert('Ebola', 5, step=1)
+        tree.insert(5, 12, step=2)
+        tree.insert(5, 3, step=2)
+        # Verify repeated inserts are ignored
+        tree.insert('Ebola', 12, step=3)
+        assert tree.size == 3
+        assert tree.is_empty() is False
+        # Verify the arrays describe each person
+        assert tree.parent[5] == InfectionTree.ROOT
+        assert tree.parent[12] == tree.parent[3] == 5
+        assert tree.step[12] == 2
+        assert tree.depth[5] == 1 and tree.depth[3] == 2
+        assert tree.children('Ebola').tolist() == [5]
+        assert tree.children(5).tolist() == [12, 3]
+        assert tree.children(3).tolist() == []
+        # Verify inserting under someone missing from the tree fails
+        with self.assertRaises(AssertionError):
+            tree.insert(7, 8)
+
+    def test_insert_many(self):
+        tree = InfectionTree(ids=[0, 1])
+        tree.insert_many([0, 0, 1], [4, 5, 6], step=2)
+        assert tree.size == 5
+        assert tree.children(0).tolist() == [4, 5]
+        assert tree.depth[6] == 2
+        assert tree.step[4] == 2
+        # Verify people already in the tree can't be inserted again
+        with self.assertRaises(AssertionError):
+            tree.insert_many([0], [6])
+
+    def test_contains(self):
+        ids = [123, 234, 456, 567]
+        tree = InfectionTree(ids=ids)
+        # Verify contains for all positive cases
+        for id in ids + ['Virus']:
+            assert tree.contains(id) is True
+        # Verify contains for negative cases
+        assert tree.contains('B') is False
+        assert tree.contains(-1) is False
+        assert tree.contains(124) is False
+        assert tree.contains(10 ** 9) is False
+
+    def test_complete(self):
+        ids = [123, 234, 456, 567]
+        tree = InfectionTree(ids=ids)
+        # Verify completions for all integers
+        assert tree.complete('Virus') == ['Virus', 123, 234, 456, 567]
+        # Verify completions for 2nd level nodes
+        assert tree.complete(123) == [123]
+        # Verify completions after additional insertions
+        tree.insert(234, 345)
+        tree.insert(345, 7)
+        tree.insert(234, 8)
+        assert tree.complete(234) == [234, 345, 7, 8]
+        # Verify completions on negative case
+        assert tree.complete('') == []
+
+    def test_same_as_mwaytree(self):
+        rng = random.Random(0)
+        tree = InfectionTree('Ebola')
+        mway_tree = MWayTree('Ebola')
+        infected = ['Ebola']
+        for child in rng.sample(range(2000), 1000):
+            parent = rng.choice(infected)
+            tree.insert(parent, child)
+            mway_tree.insert(parent, child)
+            infected.append(child)
+        # Verify level order and completions match the m-way tree
+        assert tree.ids() == [node.id for node in mway_tree.ids()]
+        for id in infected[:50]:
+            assert tree.complete(id) == mway_tree.complete(id)
+
+    def test_depth_queries(self):
+        tree = InfectionTree(ids=[0, 1])
+        tree.insert(0, 2)
+        tree.insert(2, 3)
+        tree.insert(2, 4)
+        assert tree.at_depth(1).tolist() == [0, 1]
+        assert tree.at_depth(3).tolist() == [3, 4]
+        sizes = tree.subtree_sizes()
+        assert sizes[0] == 4
+        assert sizes[1] == 1
+        assert sizes[2] == 3
+        assert np.sum(sizes[tree.at_depth(1)]) == tree.size
+
+
+if __name__ == '__main__':
+    unittest.main()
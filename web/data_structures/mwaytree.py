@@ -5,7 +5,8 @@ this class:
 https://github.com/Make-School-Courses/CS-2.1-Trees-Sorting/blob/master/Code/prefixtree.py
 '''
 from .mwaytreenode import MWayTreeNode
-from queue import Queue
+from .tree_json import iter_tree_json, CHUNK_SIZE
+from collections import deque
 
 
 class MWayTree:
@@ -22,6 +23,8 @@ class MWayTree:
         if virus_name is None:
             virus_name = MWayTree.START
         self.root = MWayTreeNode(virus_name)
+        # Map each id in the tree to its node, for constant time lookups
+        self.nodes = {virus_name: self.root}
         # Count the number of ids inserted into the tree
         self.size = 0
         # Insert each id, if any were given
@@ -30,13 +33,13 @@ class MWayTree:
                 self.insert(virus_name, id)
 
     def contains(self, id):
-        '''Return True if this m-way tree contains the given id.'''
-        ids = self.ids()
-        # see if id matches the values of any of the nodes
-        for node in ids:
-            if id == node.id:
-                return True
-        return False
+        '''Return True if this m-way tree contains the given id.
+
+           Runtime Complexity:
+           O(1), because the id is looked up in the dictionary of nodes.
+
+        '''
+        return id in self.nodes
 
     def is_empty(self):
         """Return True if this m-way tree is empty (contains no strings).
@@ -60,46 +63,80 @@ class MWayTree:
             # add the newly infected person's id in
             child_node = MWayTreeNode(child_id)
             parent_node.add_child(child_id, child_node)
+            self.nodes[child_id] = child_node
 
     def _find_node(self, id):
-        """Return the node storing the id, and the depth
-           that was searched to find the value in the tree.
-           Traversal performed using breadth first search.
+        """Return the node storing the id, or None if it is not in the tree.
 
+           Runtime Complexity:
+           O(1), because the id is looked up in the dictionary of nodes.
 
         """
         if not self.is_empty():
-            # Traverse tree level-order from root, appending each node's item
-            queue = Queue()
-            # Enqueue given starting node
-            queue.put(self.root)
-            # Loop until queue is empty
-            while not queue.qsize() == 0:
-                # Dequeue node at front of queue
-                node = queue.get()
-                # check if this is the node we're looking for
-                node_id = node.id
-                if node_id == id:
-                    return node
-                # Enqueue the node's children as well
-                for next_node in node.children:
-                    queue.put(node.children[next_node])
+            return self.nodes.get(id)
         # Return None if the node is not found
         return None
 
+    def iter_pre_order(self, node=None):
+        """Yield the nodes under the given node (the root, by default) with
+           iterative depth-first traversal, each node before its children.
+
+           Runtime Complexity:
+           O(n) time in total, with no recursion, so trees of any depth can be
+           walked. The stack holds the siblings still to visit, not the path.
+
+        """
+        if node is None:
+            node = self.root
+        stack = [node]
+        while len(stack) > 0:
+            node = stack.pop()
+            yield node
+            # push the children in reverse, so the first child is next
+            stack.extend(list(node.child_nodes())[::-1])
+
+    def iter_post_order(self, node=None):
+        """Yield the nodes under the given node (the root, by default) with
+           iterative depth-first traversal, each node after its children.
+
+        """
+        if node is None:
+            node = self.root
+        # each node on the path down, with an iterator over its children
+        stack = [(node, iter(node.child_nodes()))]
+        while len(stack) > 0:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                yield node
+            else:
+                stack.append((child, iter(child.child_nodes())))
+
+    def iter_level_order(self, node=None):
+        """Yield the nodes under the given node (the root, by default) with
+           iterative level-order traversal (BFS).
+
+        """
+        if node is None:
+            node = self.root
+        queue = deque([node])
+        while len(queue) > 0:
+            node = queue.popleft()
+            yield node
+            queue.extend(node.child_nodes())
+
     def _traverse_pre_order(self, node, id, visit):
-        """Traverse this m-way tree with recursive depth-first traversal.
+        """Traverse this m-way tree with depth-first traversal.
            Start at the given node with the given m-way representing its path
            in this m-way tree and visit each node with the given visit
            function.
 
         """
         if node is not None:
-            # Visit this node's data with given function
-            visit(node.id)
-            # Traverse the subtrees of all the children
-            for next_id in node.children:
-                self._traverse_pre_order(node.children[next_id], id, visit)
+            for next_node in self.iter_pre_order(node):
+                # Visit this node's data with given function
+                visit(next_node.id)
 
     def complete(self, id):
         """Return a list of all ids that fall under a specific id.
@@ -116,24 +153,21 @@ class MWayTree:
         return completions
 
     def _traverse_level_order(self, start_node, visit):
-        """Traverse this binary tree with iterative level-order traversal
+        """Traverse this m-way tree with iterative level-order traversal
            (BFS). Start at the given node and visit each node with the given
            function.
 
        """
-        # Create queue to store nodes not yet traversed in level-order
-        queue = Queue()
-        # Enqueue given starting node
-        queue.put(start_node)
-        # Loop until queue is empty
-        while not queue.qsize() == 0:
-            # Dequeue node at front of queue
-            node = queue.get()
-            # Visit the node
+        for node in self.iter_level_order(start_node):
             visit(node)
-            # Enqueue the node's children as well
-            for next_node in node.children:
-                queue.put(node.children[next_node])
+
+    def iter_json(self, chunk_size=CHUNK_SIZE):
+        """Yield the nested {"name", "children"} JSON document of this tree
+           in chunks of text, with the name of each node as a string.
+
+        """
+        return iter_tree_json(self.root, MWayTreeNode.child_nodes,
+                              lambda node: str(node.id), chunk_size)
 
     def ids(self):
         """Return a list of all ids stored in this m-way tree.
@@ -143,5 +177,4 @@ class MWayTree:
         # Create a list of all ids in m-way tree
         all_ids = []
         self._traverse_level_order(self.root, all_ids.append)
-        print(all_ids)
         return all_ids
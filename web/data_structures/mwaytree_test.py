@@ -160,6 +160,19 @@ class MWayTreeTest(unittest.TestCase):
         assert tree.contains('C') is False
         assert tree.contains('D') is False
 
+    def test_find_node(self):
+        ids = [123, 234, 456, 567]
+        tree = MWayTree(ids=ids)
+        tree.insert(234, 345)
+        # Verify every id maps to the node that stores it
+        for id in ids + [345]:
+            node = tree._find_node(id)
+            assert isinstance(node, MWayTreeNode)
+            assert node.id == id
+        assert tree._find_node(234).get_child(345) is tree._find_node(345)
+        # Verify ids missing from the tree are not found
+        assert tree._find_node(678) is None
+
     def test_complete(self):
         ids = [123, 234, 456, 567]
         tree = MWayTree(ids=ids)
@@ -192,6 +205,32 @@ class MWayTreeTest(unittest.TestCase):
         for node in tree_ids[1:]:
             assert node.id in ids
 
+    def test_traversal_orders(self):
+        tree = MWayTree(ids=[1, 2])
+        tree.insert(1, 3)
+        tree.insert(1, 4)
+        tree.insert(3, 5)
+        # Verify each traversal yields nodes in its order
+        pre_order = [node.id for node in tree.iter_pre_order()]
+        assert pre_order == ['Virus', 1, 3, 5, 4, 2]
+        post_order = [node.id for node in tree.iter_post_order()]
+        assert post_order == [5, 3, 4, 1, 2, 'Virus']
+        level_order = [node.id for node in tree.iter_level_order()]
+        assert level_order == ['Virus', 1, 2, 3, 4, 5]
+        # Verify traversals can start under the root
+        start = tree._find_node(1)
+        post_order = [node.id for node in tree.iter_post_order(start)]
+        assert post_order == [5, 3, 4, 1]
+
+    def test_traverse_long_chain(self):
+        tree = MWayTree(ids=[0])
+        # Verify a chain far deeper than the recursion limit can be walked
+        for id in range(1, 10000):
+            tree.insert(id - 1, id)
+        assert tree.complete(0) == list(range(10000))
+        assert len(list(tree.iter_post_order())) == 10001
+        assert len(tree.ids()) == 10001
+
 
 if __name__ == '__main__':
     unittest.main()
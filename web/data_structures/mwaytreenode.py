@@ -10,44 +10,80 @@ class MWayTreeNode:
     """MWayTreeNode: A node for use in a m-way tree that stores a
        single data value. Can have up to (m - 1) siblings.
 
+       Attributes are stored in __slots__, and the structure of children
+       nodes is only made once the node has a child, since most nodes in a
+       tree of infections are leaves.
+
     """
     # Choose an appropriate data structure to store children nodes in
     CHILDREN_TYPE = dict  # or list
 
+    __slots__ = ('id', '_children')
+
     def __init__(self, id=None):
-        """Initialize this m-way tree node with the given id value, an
-        empty structure of children nodes."""
+        """Initialize this m-way tree node with the given id value, and no
+        structure of children nodes until one is needed."""
         # id that this node represents
         self.id = id
         # Data structure to associate id keys to children node values
-        self.children = MWayTreeNode.CHILDREN_TYPE()
+        self._children = None
+
+    @property
+    def children(self):
+        """Return the structure associating id keys to children nodes,
+           making it if this node has none yet.
+
+        """
+        if self._children is None:
+            self._children = MWayTreeNode.CHILDREN_TYPE()
+        return self._children
+
+    def child_ids(self):
+        """Return the ids of this node's children, without making the
+           structure of children nodes for a leaf.
+
+        """
+        if self._children is None:
+            return ()
+        return self._children.keys()
+
+    def child_nodes(self):
+        """Return this node's children nodes, without making the structure
+           of children nodes for a leaf.
+
+        """
+        if self._children is None:
+            return ()
+        return self._children.values()
 
     def num_children(self):
         """Return the number of children nodes this m-way tree node has.
 
-           Runtime Complexity: O(n)
+           Runtime Complexity: O(1)
 
         """
-        return len(self.children.keys())
+        if self._children is None:
+            return 0
+        return len(self._children)
 
     def has_child(self, id):
         """Return True if this m-way tree node has a child node that
            represents the given id amongst its children.
 
-           Runtime Complexity: O(n)
+           Runtime Complexity: O(1)
 
         """
-        return (id in self.children.keys())
+        return self._children is not None and id in self._children
 
     def get_child(self, id):
         """Return this m-way tree node's child node that represents the given
            id if it is amongst its children, or raise ValueError if not.
 
-           Runtime Complexity: O(n)
+           Runtime Complexity: O(1)
 
         """
         if self.has_child(id) is True:
-            return self.children.get(id)
+            return self._children.get(id)
         else:
             raise ValueError(f'No child exists for id {id!r}')
 
@@ -55,7 +91,7 @@ class MWayTreeNode:
         """Add the given id and child node as a child of this node, or
            raise ValueError if given id is amongst this node's children.
 
-           Runtime Complexity: O(n)
+           Runtime Complexity: O(1)
 
         """
         if self.has_child(id) is False:
@@ -51,6 +51,21 @@ class MWayTreeNodeStringTest(unittest.TestCase):
         with self.assertRaises(ValueError):
             node_A.add_child('C', node_C)
 
+    def test_children_made_lazily(self):
+        node_A = MWayTreeNode('A')
+        # Verify nodes have no __dict__, and leaves no structure of children
+        assert not hasattr(node_A, '__dict__')
+        assert node_A._children is None
+        assert list(node_A.child_ids()) == []
+        assert list(node_A.child_nodes()) == []
+        assert node_A._children is None
+        # Verify adding a child makes the structure of children
+        node_B = MWayTreeNode('B')
+        node_A.add_child('B', node_B)
+        assert list(node_A.child_ids()) == ['B']
+        assert list(node_A.child_nodes()) == [node_B]
+        assert node_A.children == {'B': node_B}
+
 
 class MWayTreeNodeIntegerTest(unittest.TestCase):
     def test_init_and_properties(self):
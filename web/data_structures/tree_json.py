@@ -0,0 +1,107 @@
+#!python3
+import json
+import zlib
+
+# Writes a tree as the nested {"name": ..., "children": [...]} JSON document
+# that the D3 population trees consume, without recursion. The output is the
+# same text json.dumps gives for the nested dicts, except that trees of any
+# depth can be written, and the text comes out in chunks as it is made.
+
+# characters collected before a chunk of the document is yielded
+CHUNK_SIZE = 1 << 16
+# a wbits of 31 reads and writes the gzip format, rather than raw zlib
+GZIP_WBITS = 31
+
+
+def iter_tree_json(root, get_children, get_name, chunk_size=CHUNK_SIZE):
+    """Yield the JSON document of a tree in chunks of text.
+
+       Nodes without children have no "children" key. Only the path from the
+       root to the current node is held in memory, along with one chunk.
+
+       Parameters:
+       root: the node at the top of the tree
+       get_children(function): returns a list of the children of a node
+       get_name(function): returns the name (str) of a node
+       chunk_size(int): roughly how many characters to yield at a time
+
+       Returns:
+       generator: str chunks which join into the whole document
+
+    """
+    pieces = list()
+    size = 0
+    # iterators over the children still to be written, at each level
+    stack = list()
+    node, first = root, True
+    while True:
+        if node is not None:
+            # open the node, then go down to its children, if any
+            piece = '{"name": ' + json.dumps(get_name(node))
+            if not first:
+                piece = ', ' + piece
+            children = get_children(node)
+            if len(children) > 0:
+                piece += ', "children": ['
+                stack.append(iter(children))
+                first = True
+            else:
+                piece += '}'
+                first = False
+            pieces.append(piece)
+            size += len(piece)
+        elif len(stack) > 0:
+            # every child of the innermost node has been written
+            stack.pop()
+            pieces.append(']}')
+            size += 2
+            first = False
+        if size >= chunk_size:
+            yield ''.join(pieces)
+            pieces = list()
+            size = 0
+        if len(stack) == 0:
+            break
+        node = next(stack[-1], None)
+    yield ''.join(pieces)
+
+
+def gzip_chunks(chunks):
+    """Return the gzipped bytes of a document given as chunks of text.
+
+       Each chunk is compressed as it comes, so the whole text is never held
+       in memory at once.
+
+       Parameters:
+       chunks(iterable): str chunks of the document, like iter_tree_json's
+
+       Returns:
+       bytes: the gzipped document
+
+    """
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+    parts = [compressor.compress(chunk.encode()) for chunk in chunks]
+    parts.append(compressor.flush())
+    return b''.join(parts)
+
+
+def iter_gunzip(body, chunk_size=CHUNK_SIZE):
+    """Yield a gzipped document decompressed, a piece at a time.
+
+       Parameters:
+       body(bytes): the gzipped document
+       chunk_size(int): how many compressed bytes to read at a time
+
+       Returns:
+       generator: bytes chunks which join into the decompressed document
+
+    """
+    decompressor = zlib.decompressobj(wbits=GZIP_WBITS)
+    view = memoryview(body)
+    for start in range(0, len(view), chunk_size):
+        chunk = decompressor.decompress(view[start:start + chunk_size])
+        if len(chunk) > 0:
+            yield chunk
+    chunk = decompressor.flush()
+    if len(chunk) > 0:
+        yield chunk
@@ -0,0 +1,77 @@
+#!python3
+from .tree_json import iter_tree_json, gzip_chunks, iter_gunzip
+from .mwaytree import MWayTree
+import gzip
+import json
+import random
+import unittest
+
+
+def nested_dict(node):
+    """Return the nested dict of a node, the way the API builds it."""
+    data = {'name': str(node.id)}
+    children = [nested_dict(child) for child in node.child_nodes()]
+    if len(children) > 0:
+        data['children'] = children
+    return data
+
+
+class TreeJsonTest(unittest.TestCase):
+
+    def test_same_as_json_dumps(self):
+        rng = random.Random(0)
+        for trial in range(20):
+            tree = MWayTree('Ebola')
+            infected = ['Ebola']
+            for child in rng.sample(range(1000), rng.randrange(50)):
+                parent = rng.choice(infected)
+                tree.insert(parent, child)
+                infected.append(child)
+            # Verify the chunks join into the text json.dumps writes
+            chunks = list(tree.iter_json(chunk_size=rng.randrange(1, 100)))
+            assert ''.join(chunks) == json.dumps(nested_dict(tree.root))
+
+    def test_chunks(self):
+        tree = MWayTree(ids=range(1000))
+        chunks = list(tree.iter_json(chunk_size=100))
+        # Verify the document comes out in pieces of about the chunk size
+        assert len(chunks) > 10
+        assert all(len(chunk) < 200 for chunk in chunks)
+        document = json.loads(''.join(chunks))
+        assert len(document['children']) == 1000
+
+    def test_long_chain(self):
+        tree = MWayTree(ids=[0])
+        for id in range(1, 10000):
+            tree.insert(id - 1, id)
+        # Verify a chain deeper than the recursion limit can be written
+        document = ''.join(tree.iter_json())
+        assert document.startswith('{"name": "Virus", "children": [')
+        assert document.endswith('{"name": "9999"}' + ']}' * 10000)
+
+    def test_custom_nodes(self):
+        children = {'a': ['b', 'c'], 'b': ['d']}
+        chunks = iter_tree_json('a', lambda node: children.get(node, []),
+                                lambda node: node.upper())
+        assert json.loads(''.join(chunks)) == {
+            'name': 'A',
+            'children': [
+                {'name': 'B', 'children': [{'name': 'D'}]},
+                {'name': 'C'}
+            ]
+        }
+
+    def test_gzip_round_trip(self):
+        tree = MWayTree(ids=range(5000))
+        body = gzip_chunks(tree.iter_json(chunk_size=1000))
+        document = ''.join(tree.iter_json()).encode()
+        # Verify the body is a gzip file of the whole document
+        assert gzip.decompress(body) == document
+        # Verify it is inflated again a piece at a time
+        chunks = list(iter_gunzip(body, chunk_size=64))
+        assert len(chunks) > 1
+        assert b''.join(chunks) == document
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,14 @@
 from django.contrib import admin
-from .models import Experiment, TimeStep, InfectedNode
+from .models import (
+    Experiment,
+    TimeStep,
+    InfectedNode,
+    PopulationTree,
+    EnsembleSummary
+)
 
 admin.site.register(Experiment)
 admin.site.register(TimeStep)
 admin.site.register(InfectedNode)
+admin.site.register(PopulationTree)
+admin.site.register(EnsembleSummary)
@@ -6,7 +6,13 @@ class ExperimentForm(forms.ModelForm):
     '''A form based off the  Experiment model.'''
     class Meta:
         model = Experiment
-        exclude = [
-            'init_report',
-            'final_summary',
+        # only the conditions of the experiment, not the state of its job
+        fields = [
+            'title',
+            'population_size',
+            'vaccination_percent',
+            'virus_name',
+            'mortality_chance',
+            'reproductive_rate',
+            'initial_infected',
         ]
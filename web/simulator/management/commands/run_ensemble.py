@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from simulator.models import Experiment
+
+
+class Command(BaseCommand):
+    '''Runs many replicates of an Experiment, and saves their summary.'''
+    help = 'Run replicates of an experiment in parallel, and summarize them.'
+
+    def add_arguments(self, parser):
+        '''Options for which Experiment to run, and how many times.'''
+        parser.add_argument('experiment_id', type=int)
+        parser.add_argument('--replicates', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of processes, defaults to all cores.')
+
+    def handle(self, *args, **options):
+        """Run the ensemble, and report where its summary was saved.
+
+           Parameters:
+           options(dict): values of the command line arguments
+
+        """
+        experiment = Experiment.objects.get(pk=options['experiment_id'])
+        summary = experiment.run_ensemble(options['replicates'],
+                                          seed=options['seed'],
+                                          max_workers=options['workers'])
+        self.stdout.write(f'Saved ensemble summary {summary.pk} of ' +
+                          f'{summary.replicates} replicates.')
@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from simulator.models import Experiment
+
+
+class Command(BaseCommand):
+    '''Worker which runs queued Experiments outside of the web process.'''
+    help = 'Run queued experiments as they are submitted.'
+
+    def add_arguments(self, parser):
+        '''Options for how long to wait between polls of the queue.'''
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        """Claim and run queued Experiments one at a time, until stopped.
+
+           Parameters:
+           options(dict): values of the command line arguments
+
+        """
+        while True:
+            experiment = Experiment.claim_next()
+            if experiment is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+            self.stdout.write(f'Running experiment {experiment.pk}...')
+            if experiment.run_job():
+                self.stdout.write(f'Experiment {experiment.pk} is done.')
+            else:
+                self.stderr.write(f'Experiment {experiment.pk} failed.')
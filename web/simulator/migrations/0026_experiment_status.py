@@ -0,0 +1,24 @@
+# Generated by Django 3.0.14 on 2026-10-18 15:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0025_auto_20200511_0404'),
+    ]
+
+    operations = [
+        # experiments saved before the job queue existed already ran
+        migrations.AddField(
+            model_name='experiment',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='done', help_text='Progress of the background job that runs the experiment.', max_length=7),
+        ),
+        migrations.AlterField(
+            model_name='experiment',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='queued', help_text='Progress of the background job that runs the experiment.', max_length=7),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.0.14 on 2026-10-18 16:20
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0026_experiment_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnsembleSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('replicates', models.IntegerField(help_text='How many times was the experiment run?')),
+                ('steps', django.contrib.postgres.fields.jsonb.JSONField(help_text='For each time step, the mean, confidence interval and quantiles of every TimeStep field across the replicates.')),
+                ('created', models.DateTimeField(auto_now_add=True, help_text='The date and time this summary was created.')),
+                ('experiment', models.ForeignKey(help_text='The related Experiment.', on_delete=django.db.models.deletion.CASCADE, to='simulator.Experiment')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.0.14 on 2026-10-18 16:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0027_ensemblesummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopulationTree',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document', models.BinaryField(help_text='The tree of infected persons, nested from the virus down, as gzipped JSON.')),
+                ('experiment', models.OneToOneField(help_text='The related Experiment.', on_delete=django.db.models.deletion.CASCADE, related_name='population_tree', to='simulator.Experiment')),
+            ],
+        ),
+    ]
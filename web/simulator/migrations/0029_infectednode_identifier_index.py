@@ -0,0 +1,17 @@
+# Generated by Django 3.0.14 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0028_populationtree'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='infectednode',
+            index=models.Index(fields=['experiment', 'identifier'], name='simulator_i_experim_beda3c_idx'),
+        ),
+    ]
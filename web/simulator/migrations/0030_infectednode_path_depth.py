@@ -0,0 +1,53 @@
+# Generated by Django 3.0.14 on 2026-10-18 16:28
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+# fill in the path and depth of the nodes already saved, walking down from
+# each virus node in one recursive query
+FILL_PATHS = """
+WITH RECURSIVE lineage(id, path) AS (
+    SELECT id, ARRAY[]::integer[]
+    FROM simulator_infectednode
+    WHERE parent_id IS NULL
+  UNION ALL
+    SELECT node.id, lineage.path || node.parent_id
+    FROM simulator_infectednode node
+    JOIN lineage ON node.parent_id = lineage.id
+)
+UPDATE simulator_infectednode
+SET path = lineage.path, depth = cardinality(lineage.path)
+FROM lineage
+WHERE simulator_infectednode.id = lineage.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0029_infectednode_identifier_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='infectednode',
+            name='depth',
+            field=models.IntegerField(default=0, help_text='Number of infections between the virus and this person, which is 0 for the virus, and 1 for patient zero.'),
+        ),
+        migrations.AddField(
+            model_name='infectednode',
+            name='path',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, help_text='ids of the ancestors of this node, from the virus down to its parent.', size=None),
+        ),
+        migrations.RunSQL(FILL_PATHS, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='infectednode',
+            index=models.Index(fields=['experiment', 'depth'], name='simulator_i_experim_700237_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='infectednode',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['path'], name='simulator_i_path_d9ab23_gin'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.14 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0030_infectednode_path_depth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='experiment',
+            name='claimed',
+            field=models.DateTimeField(blank=True, help_text='When a worker last started running the experiment.', null=True),
+        ),
+    ]
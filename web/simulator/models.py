@@ -1,17 +1,34 @@
-from django.db import models
+import datetime
+import logging
+from django.db import models, connection, transaction
 from analysis.person import Person
 from analysis.web_simulation import WebSimulation
 from analysis.virus import Virus
+from analysis.ensemble import run_ensemble
 from web import settings
 from django.utils import timezone
 from django.urls import reverse
 from data_structures.mwaytree import MWayTree, MWayTreeNode
-from queue import Queue
-from django.contrib.postgres.fields import ArrayField
+from data_structures.tree_json import gzip_chunks
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.contrib.postgres.indexes import GinIndex
+
+logger = logging.getLogger(__name__)
 
 
 class Experiment(models.Model):
     '''An experiment by the user to test the herd immunity of a population.'''
+    # states of the background job that runs the experiment
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
     title = models.CharField(max_length=settings.EXPER_TITLE_MAX_LENGTH,
                              unique=False,
                              help_text="Title of your experiment.")
@@ -34,6 +51,12 @@ class Experiment(models.Model):
         "How many people in the population " +
         "start out infected with the virus?"
     ))
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES,
+                              default=QUEUED, db_index=True,
+                              help_text=("Progress of the background job "
+                                         + "that runs the experiment."))
+    claimed = models.DateTimeField(null=True, blank=True, help_text=(
+        "When a worker last started running the experiment."))
 
     def __str__(self):
         '''Return the title of the Experiment instance.'''
@@ -66,61 +89,80 @@ class Experiment(models.Model):
         return WebSimulation(pop_size, vacc_percentage, virus,
                              initial_infected)
 
-    def make_basic_node(self, node):
-        """Return an InfectedNode instance with an empty parent field
-           If there is already an InfectedNode instance for the node, retrieve
-           that from the db instead.
-        """
-        infected_node, truth = InfectedNode.objects.get_or_create(
-            experiment=self,
-            identifier=node.id,
-            children=list(node.children.keys())
-        )
+    def reserve_node_ids(self, count):
+        """Return a list of primary keys for new InfectedNode rows, drawn from
+           the table's sequence in a single query.
 
-        return infected_node
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) " +
+                "FROM generate_series(1, %s)",
+                [InfectedNode._meta.db_table, count]
+            )
+            return [row[0] for row in cursor.fetchall()]
 
     def store_infected_persons(self, population_tree):
         """Instaniates and saves instances of InfectedNode related to this
            Experiment.
 
+           Every node in the tree is given a primary key up front, so the
+           links to parents, and the path of ancestors of each node, are set
+           in memory, and all the rows are written with batched inserts
+           instead of several queries per node.
+
         """
-        # Create queue to store nodes not yet traversed in level-order
-        queue = Queue()
-        # Enqueue starting at the virus, and then all the initial infected
-        virus_node = population_tree.root
-        queue.put(virus_node)
-        # Loop until queue is empty
-        while queue.qsize() > 0:
-            # Dequeue node at front of queue
-            parent_node = queue.get()
-            # Set the node's children to point to their parent
-            infected_by_parent = list()
-            for node in parent_node.children:
-                # grab instance of MWayTreeNode
-                child = parent_node.children[node]
-                # enqueue the MWayTreeNode to be the next parent
-                queue.put(child)
-                # prepare the InfectedNodes for initialization
-                next_node = self.make_basic_node(child)
-                infected_by_parent.append(next_node)
-            # make basic node of the parent
-            parent_node = self.make_basic_node(parent_node)
-            for next_node in infected_by_parent:
-                # point out its relationship to the parent, and save
-                next_node.parent = parent_node
-                next_node.save()
-            # Save the parent in the db
-            parent_node.save()
+        # list the nodes in level-order, with the position of each's parent
+        tree_nodes = [population_tree.root]
+        parent_positions = [None]
+        position = 0
+        while position < len(tree_nodes):
+            for child in tree_nodes[position].child_nodes():
+                tree_nodes.append(child)
+                parent_positions.append(position)
+            position += 1
+        # give each node an id, then point it to its parent
+        node_ids = self.reserve_node_ids(len(tree_nodes))
+        infected_nodes = list()
+        for node, node_id, parent_position in zip(tree_nodes, node_ids,
+                                                  parent_positions):
+            parent_id = None
+            path = list()
+            if parent_position is not None:
+                parent_id = node_ids[parent_position]
+                # parents come first, so their paths are already made
+                path = infected_nodes[parent_position].path + [parent_id]
+            infected_nodes.append(InfectedNode(
+                id=node_id,
+                experiment=self,
+                identifier=node.id,
+                parent_id=parent_id,
+                children=list(node.child_ids()),
+                path=path,
+                depth=len(path)
+            ))
+        # parents precede their children, so every batch can be checked
+        InfectedNode.objects.bulk_create(
+            infected_nodes, batch_size=settings.BULK_CREATE_BATCH_SIZE)
 
     def run_experiment(self):
-        '''Runs through the experiment, and generates time step graphs.'''
+        '''Runs through the experiment, and generates time step graphs.
+
+           All the related rows are written in one transaction, so a failed
+           run never leaves a partial set of results behind.
+
+           Returns:
+           bool: False if the results were thrown away, because another
+                 worker claimed the experiment while this one ran it
+
+        '''
         # update Simulation properties with form data
         web_sim = self.generate_web_sim()
         # run through the simulation, collect data to make TimeStep instances
         data_collection = web_sim.run_and_collect(self)
-        # insert new TimeSteps into the db
-        for ts in data_collection[:-1]:
-            time_step = TimeStep.objects.create(
+        # build the new TimeSteps in memory
+        time_steps = [
+            TimeStep(
                 step_id=ts.get('step_id'),
                 total_infected=ts.get('total_infected'),
                 current_infected=ts.get('current_infected'),
@@ -130,11 +172,105 @@ class Experiment(models.Model):
                 uninfected=ts.get('uninfected'),
                 uninteracted=ts.get('uninteracted'),
                 experiment=ts.get('experiment')
-            )
-            time_step.save()
-        # initialize population tree of infected persons
-        population_tree = data_collection[-1]
-        self.store_infected_persons(population_tree)
+            ) for ts in data_collection[:-1]
+        ]
+        with transaction.atomic():
+            # lock the row, and leave the results to the worker which
+            # claimed the experiment again, if this one took too long
+            if not Experiment.objects.select_for_update().filter(
+                    pk=self.pk, claimed=self.claimed).exists():
+                logger.warning('Experiment %s was claimed by another worker',
+                               self.pk)
+                return False
+            # insert new TimeSteps into the db
+            TimeStep.objects.bulk_create(
+                time_steps, batch_size=settings.BULK_CREATE_BATCH_SIZE)
+            # initialize population tree of infected persons
+            population_tree = data_collection[-1]
+            self.store_infected_persons(population_tree)
+            PopulationTree.objects.create(
+                experiment=self,
+                document=PopulationTree.compress(population_tree))
+            # the results are only visible once they are all saved
+            self.status = Experiment.DONE
+            self.save(update_fields=['status'])
+        return True
+
+    def run_ensemble(self, replicates, seed=None, max_workers=None):
+        """Run replicates of this experiment in parallel, and save a summary
+           of the spread of their results at each step.
+
+           Parameters:
+           replicates(int): number of simulations to run
+           seed(int): entropy for the replicates' seeds
+           max_workers(int): number of processes to run them in
+
+           Returns:
+           EnsembleSummary: the saved summary
+
+        """
+        virus = Virus(self.virus_name, self.reproductive_rate,
+                      self.mortality_chance)
+        summary = run_ensemble(virus, self.population_size,
+                               self.vaccination_percent,
+                               self.initial_infected, replicates, seed=seed,
+                               max_workers=max_workers)
+        return EnsembleSummary.objects.create(experiment=self,
+                                              replicates=replicates,
+                                              steps=summary['steps'])
+
+    @classmethod
+    def claim_next(cls):
+        """Return the oldest queued Experiment, after marking it as running.
+
+           Rows claimed by other workers are skipped rather than waited on,
+           so any number of workers can share the queue. An Experiment which
+           has been running for longer than EXPERIMENT_CLAIM_TIMEOUT lost its
+           worker (to a crash, or a deploy), and is claimed again.
+
+           Returns:
+           Experiment: the claimed instance, or None if the queue is empty
+
+        """
+        now = timezone.now()
+        stale = now - datetime.timedelta(
+            seconds=settings.EXPERIMENT_CLAIM_TIMEOUT)
+        with transaction.atomic():
+            experiment = cls.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                models.Q(status=cls.QUEUED) |
+                models.Q(status=cls.RUNNING, claimed__lt=stale)
+            ).order_by('pk').first()
+            if experiment is not None:
+                if experiment.status == cls.RUNNING:
+                    logger.warning('Claiming experiment %s again, as its '
+                                   'worker stopped', experiment.pk)
+                experiment.status = cls.RUNNING
+                experiment.claimed = now
+                experiment.save(update_fields=['status', 'claimed'])
+        return experiment
+
+    def run_job(self):
+        """Run the experiment as a background job, recording whether it
+           failed.
+
+           Returns:
+           bool: True if the experiment ran to completion
+
+        """
+        try:
+            if not self.run_experiment():
+                return False
+        except Exception:
+            logger.exception('Experiment %s failed', self.pk)
+            self.status = Experiment.FAILED
+            # unless another worker has claimed the experiment since
+            Experiment.objects.filter(
+                pk=self.pk, claimed=self.claimed
+            ).update(status=self.status)
+            return False
+        return True
 
 
 class TimeStep(models.Model):
@@ -190,7 +326,82 @@ class InfectedNode(models.Model):
                     models.CharField(
                         max_length=settings.EXPER_TITLE_MAX_LENGTH,
                         unique=False), blank=True, null=True)
+    path = ArrayField(models.IntegerField(), default=list, blank=True,
+                      help_text=("ids of the ancestors of this node, from "
+                                 + "the virus down to its parent."))
+    depth = models.IntegerField(default=0, help_text=(
+        "Number of infections between the virus and this person, which is "
+        + "0 for the virus, and 1 for patient zero."))
+
+    class Meta:
+        indexes = [
+            # branches of the tree are looked up by the identifiers of people
+            models.Index(fields=['experiment', 'identifier']),
+            models.Index(fields=['experiment', 'depth']),
+            # finds the descendants of a node, as the rows whose path has it
+            GinIndex(fields=['path']),
+        ]
 
     def __str__(self):
         '''Return a unique phrase identifying the TimeStep.'''
         return f'{self.experiment}: {self.identifier}'
+
+    def ancestors(self):
+        '''Return the nodes from the virus down to this node's parent.'''
+        return InfectedNode.objects.filter(id__in=self.path).order_by('depth')
+
+    def descendants(self):
+        '''Return every node whom this node infected, directly or not.'''
+        return InfectedNode.objects.filter(experiment_id=self.experiment_id,
+                                           path__contains=[self.id])
+
+    @staticmethod
+    def at_depth(experiment, depth):
+        '''Return the nodes of an Experiment at the given depth.'''
+        return InfectedNode.objects.filter(experiment=experiment, depth=depth)
+
+
+class PopulationTree(models.Model):
+    '''The population tree of an Experiment, as the nested JSON document the
+       population tree charts consume, compressed with gzip.'''
+    experiment = models.OneToOneField(Experiment, on_delete=models.CASCADE,
+                                      related_name='population_tree',
+                                      help_text="The related Experiment.")
+    document = models.BinaryField(help_text=(
+        "The tree of infected persons, nested from the virus down, as "
+        + "gzipped JSON."))
+
+    def __str__(self):
+        '''Return a unique phrase identifying the PopulationTree.'''
+        return f'{self.experiment}: population tree'
+
+    @staticmethod
+    def compress(population_tree):
+        """Return the JSON document of an MWayTree, gzipped.
+
+           Parameters:
+           population_tree(MWayTree): the tree of infected persons
+
+           Returns:
+           bytes: the gzipped document
+
+        """
+        return gzip_chunks(population_tree.iter_json())
+
+
+class EnsembleSummary(models.Model):
+    '''The spread of the results of many replicates of an Experiment.'''
+    experiment = models.ForeignKey(Experiment, on_delete=models.CASCADE,
+                                   help_text="The related Experiment.")
+    replicates = models.IntegerField(help_text=(
+        "How many times was the experiment run?"))
+    steps = JSONField(help_text=(
+        "For each time step, the mean, confidence interval and quantiles of "
+        + "every TimeStep field across the replicates."))
+    created = models.DateTimeField(auto_now_add=True,
+                                   help_text=("The date and time this summary"
+                                              + " was created."))
+
+    def __str__(self):
+        '''Return a unique phrase identifying the EnsembleSummary.'''
+        return f'{self.experiment}: {self.replicates} replicates'
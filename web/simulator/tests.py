@@ -1,6 +1,19 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+from django.conf import settings
+from django.core.management import call_command
 from django.test import TestCase
 from django.test.client import RequestFactory
-from simulator.models import Experiment, TimeStep
+import gzip
+import json
+from simulator.models import (
+    Experiment,
+    TimeStep,
+    InfectedNode,
+    PopulationTree
+)
+from data_structures.mwaytree import MWayTree
 from django.urls import reverse
 from simulator.views import (
     ExperimentCreate,
@@ -24,6 +37,13 @@ class ExperimentCreateTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'Please fill out the form below.')
 
+    def test_create_form_hides_job_fields(self):
+        '''The form does not let a visitor set the state of the job.'''
+        request = self.factory.get('simulator:simulation_creator')
+        response = ExperimentCreate.as_view()(request)
+        self.assertNotContains(response, 'name="claimed"')
+        self.assertNotContains(response, 'name="status"')
+
     def test_submitting_create_form(self):
         '''A site visitor adds a new Experiment.'''
         # data inputted by visitor into the form
@@ -45,6 +65,32 @@ class ExperimentCreateTests(TestCase):
         # the visitor is redirected
         self.assertEqual(response.status_code, 302)
 
+    def test_worker_runs_queued_experiment(self):
+        '''A new Experiment is run by the worker, not during the request.'''
+        form_data = {
+            'title': 'Ebola Outbreak',
+            'population_size': 1000,
+            'vaccination_percent': 0.98,
+            'virus_name': 'Ebola',
+            'mortality_chance': 0.98,
+            'reproductive_rate': 0.09,
+            'initial_infected': 12
+        }
+        request = self.factory.post('simulator:simulation_creator', form_data)
+        ExperimentCreate.as_view()(request)
+        experiment = Experiment.objects.get(title='Ebola Outbreak')
+        # the Experiment waits in the queue
+        self.assertEqual(experiment.status, Experiment.QUEUED)
+        self.assertFalse(
+            TimeStep.objects.filter(experiment=experiment).exists())
+        # the worker runs everything in the queue
+        call_command('run_experiments', once=True, stdout=StringIO())
+        experiment.refresh_from_db()
+        self.assertEqual(experiment.status, Experiment.DONE)
+        self.assertTrue(
+            TimeStep.objects.filter(experiment=experiment).exists())
+        self.assertIsNone(Experiment.claim_next())
+
 
 class ExperimentListTests(TestCase):
     '''A user sees the experiments ran by other users.'''
@@ -105,6 +151,139 @@ class ExperimentDetailTests(TestCase):
             TimeStep.objects.filter(experiment=self.experiment).last().step_id
         )
         self.assertContains(response, f'<th scope="row">{time_step_id}</th>')
+        # each row links to the image of that step's bar graph
+        chart_url = reverse('api:ts_chart', args=[id, time_step_id, 'png'])
+        self.assertContains(response, f'href="{chart_url}"')
+
+
+class ExperimentModelTests(TestCase):
+    '''The results of an experiment are saved to the db.'''
+    def setUp(self):
+        '''Instaniate an Experiment object to use in tests.'''
+        self.experiment = Experiment.objects.create(title='Ebola Outbreak',
+                                                    population_size=1000,
+                                                    vaccination_percent=0.98,
+                                                    virus_name='Ebola',
+                                                    mortality_chance=0.98,
+                                                    reproductive_rate=0.09,
+                                                    initial_infected=12)
+
+    def test_store_infected_persons(self):
+        '''Every node of the population tree is saved with its parent.'''
+        tree = MWayTree(virus_name='Ebola', ids=[1, 2])
+        tree.insert(1, 3)
+        tree.insert(3, 4)
+        self.experiment.store_infected_persons(tree)
+        nodes = InfectedNode.objects.filter(experiment=self.experiment)
+        self.assertEqual(nodes.count(), 5)
+        # the virus is the root, and has no parent
+        virus = nodes.get(identifier='Ebola')
+        self.assertIsNone(virus.parent)
+        self.assertEqual(virus.children, ['1', '2'])
+        # everyone else points to whomever infected them
+        self.assertEqual(nodes.get(identifier='1').parent, virus)
+        self.assertEqual(nodes.get(identifier='3').parent.identifier, '1')
+        self.assertEqual(nodes.get(identifier='4').parent.identifier, '3')
+        self.assertEqual(nodes.get(identifier='4').children, [])
+
+    def test_ancestry_queries(self):
+        '''Each node is saved with the path down to it, so ancestors,
+           descendants and levels of the tree each take a single query.'''
+        tree = MWayTree(virus_name='Ebola', ids=[1, 2])
+        tree.insert(1, 3)
+        tree.insert(3, 4)
+        tree.insert(1, 5)
+        self.experiment.store_infected_persons(tree)
+        nodes = InfectedNode.objects.filter(experiment=self.experiment)
+        virus = nodes.get(identifier='Ebola')
+        person = nodes.get(identifier='4')
+        self.assertEqual(virus.path, [])
+        self.assertEqual(virus.depth, 0)
+        # the person is three infections away from the virus
+        self.assertEqual(person.depth, 3)
+        with self.assertNumQueries(1):
+            ancestors = [node.identifier for node in person.ancestors()]
+        self.assertEqual(ancestors, ['Ebola', '1', '3'])
+        patient_zero = nodes.get(identifier='1')
+        with self.assertNumQueries(1):
+            descendants = [node.identifier
+                           for node in patient_zero.descendants()]
+        self.assertCountEqual(descendants, ['3', '4', '5'])
+        with self.assertNumQueries(1):
+            level = [node.identifier
+                     for node in InfectedNode.at_depth(self.experiment, 2)]
+        self.assertCountEqual(level, ['3', '5'])
+
+    def test_claim_experiment_of_stopped_worker(self):
+        '''An Experiment left running by a worker which stopped is claimed
+           again, and only the new worker's results are kept.'''
+        stopped = Experiment.claim_next()
+        self.assertEqual(stopped, self.experiment)
+        self.assertIsNotNone(stopped.claimed)
+        # a running experiment is left alone, until its claim is stale
+        self.assertIsNone(Experiment.claim_next())
+        Experiment.objects.filter(pk=stopped.pk).update(
+            claimed=stopped.claimed - timedelta(
+                seconds=settings.EXPERIMENT_CLAIM_TIMEOUT + 1))
+        stopped.refresh_from_db()
+        with self.assertLogs('simulator.models', 'WARNING'):
+            reclaimed = Experiment.claim_next()
+        self.assertEqual(reclaimed, self.experiment)
+        self.assertEqual(reclaimed.status, Experiment.RUNNING)
+        # a worker which lost its claim throws its results away
+        with self.assertLogs('simulator.models', 'WARNING'):
+            self.assertFalse(stopped.run_job())
+        self.assertFalse(
+            TimeStep.objects.filter(experiment=self.experiment).exists())
+        self.assertTrue(reclaimed.run_job())
+        self.experiment.refresh_from_db()
+        self.assertEqual(self.experiment.status, Experiment.DONE)
+
+    def test_run_experiment_is_atomic(self):
+        '''A run that fails partway through saves none of its results.'''
+        with patch.object(Experiment, 'store_infected_persons',
+                          side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.experiment.run_experiment()
+        self.assertFalse(
+            TimeStep.objects.filter(experiment=self.experiment).exists())
+        # a successful run saves one TimeStep for every step
+        self.experiment.run_experiment()
+        step_ids = TimeStep.objects.filter(
+            experiment=self.experiment
+        ).order_by('step_id').values_list('step_id', flat=True)
+        self.assertEqual(list(step_ids), list(range(1, len(step_ids) + 1)))
+
+    def test_run_experiment_stores_tree_document(self):
+        '''The population tree is also saved as one gzipped JSON document.'''
+        self.experiment.run_experiment()
+        document = json.loads(gzip.decompress(
+            self.experiment.population_tree.document))
+        self.assertEqual(document['name'], 'Ebola')
+        # the document holds every node saved for the experiment
+        names = list()
+        nodes = [document]
+        while len(nodes) > 0:
+            node = nodes.pop()
+            names.append(node['name'])
+            nodes.extend(node.get('children', []))
+        identifiers = InfectedNode.objects.filter(
+            experiment=self.experiment
+        ).values_list('identifier', flat=True)
+        self.assertCountEqual(names, identifiers)
+
+    def test_compress_population_tree(self):
+        '''The document nests each person under whomever infected them.'''
+        tree = MWayTree(virus_name='Ebola', ids=[1, 2])
+        tree.insert(1, 3)
+        document = gzip.decompress(PopulationTree.compress(tree))
+        self.assertEqual(json.loads(document), {
+            'name': 'Ebola',
+            'children': [
+                {'name': '1', 'children': [{'name': '3'}]},
+                {'name': '2'}
+            ]
+        })
 
 
 class LandingAndAboutPageTests(TestCase):
@@ -16,9 +16,9 @@ class ExperimentCreate(CreateView):
     template_name = 'simulator/create.html'
 
     def form_valid(self, form, *args, **kwargs):
-        '''Adds model instances to the db as appropriate.'''
+        '''Adds the Experiment to the queue of jobs, which are run by the
+           run_experiments worker outside of the request.'''
         self.object = form.save()
-        self.object.run_experiment()
         return HttpResponseRedirect(self.get_success_url())
 
 
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 import dj_database_url
 import django_heroku
@@ -22,6 +23,13 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # max length for title field of an ImmunityTest model
 EXPER_TITLE_MAX_LENGTH = 10000
 
+# max number of rows written in each query when results are saved in bulk
+BULK_CREATE_BATCH_SIZE = 1000
+
+# seconds an experiment may run before its worker is taken to have died, and
+# another worker may claim it again
+EXPERIMENT_CLAIM_TIMEOUT = 60 * 60
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.0/howto/deployment/checklist/
 
@@ -49,6 +57,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'storages',
     'simulator',
+    'api.apps.ApiConfig',
     'rest_framework',
 ]
 
@@ -99,6 +108,32 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # payloads of the charts API, shared by every worker process on a machine
+    'api': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'herd_immunity_api'),
+        'TIMEOUT': None,
+    },
+}
+
+# seconds a browser may reuse a payload of the charts API without asking
+API_CACHE_MAX_AGE = 60 * 60
+# levels of the population tree sent per request, when it is loaded lazily
+API_TREE_MAX_DEPTH = 10
+# children of each node sent per request, by default and at most
+API_TREE_PAGE_SIZE = 100
+API_TREE_MAX_PAGE_SIZE = 1000
+# nodes of the population tree sent per request, at most
+API_TREE_MAX_NODES = 2000
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 